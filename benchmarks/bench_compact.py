@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+""" memory of the parsed OSSEM tree as plain dicts against its compact_tree() form.
+
+    python3 benchmarks/bench_compact.py [--ossem ../OSSEM] [--json data/ossem.json]
+
+    without --ossem the tree in data/ossem.json is used. every case runs in a fresh process
+    and reports the bytes tracemalloc sees for the tree, how many records it holds and the
+    time to build the compact tree and expand it back to dicts """
+
+import argparse, os, sys, json, time, tracemalloc, multiprocessing
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+def load(args):
+    from ossem_parser import OSSEMParser
+    if args.ossem:
+        return OSSEMParser().parse_ossem(args.ossem)
+    with open(args.json) as fh:
+        return json.load(fh)
+
+def measure(args, compact, queue):
+    from ossem_parser import compact_tree, expand_tree, Record
+    tree = load(args)
+    # build a fresh copy of the tree (strings included) while tracing, the plain copy is
+    # dropped again once it has been compacted so only the tree being measured is counted
+    tracemalloc.start()
+    copy = json.loads(json.dumps(tree))
+    start = time.perf_counter()
+    if compact:
+        copy = compact_tree(copy)
+    seconds = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    records = []
+    def count(t):
+        if isinstance(t, Record):
+            records.append(t)
+        elif isinstance(t, dict):
+            for v in t.values():
+                count(v)
+        elif isinstance(t, list):
+            for v in t:
+                count(v)
+    count(copy)
+    start = time.perf_counter()
+    same = expand_tree(copy) == tree
+    queue.put((size, len(records), seconds, time.perf_counter() - start, same))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='benchmark the memory of the compact tree')
+    parser.add_argument('--ossem', type=str, help='base directory containing the OSSEM project')
+    parser.add_argument('--json', type=str, default=os.path.join(ROOT, 'data', 'ossem.json'), help='parsed tree to measure (default data/ossem.json)')
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context('spawn')
+    results = {}
+    for compact in (False, True):
+        queue = ctx.Queue()
+        p = ctx.Process(target=measure, args=(args, compact, queue))
+        p.start()
+        results[compact] = queue.get()
+        p.join()
+    plain, small = results[False], results[True]
+    print("plain dicts  {:>10.1f} KiB".format(plain[0] / 1024))
+    print("compact      {:>10.1f} KiB  {} records, {:.1f} ms to build, {:.1f} ms to expand, lossless: {}".format(
+        small[0] / 1024, small[1], small[2] * 1000, small[3] * 1000, small[4]))
+    print("saved        {:>10.1f} KiB ({:.0f}%)".format((plain[0] - small[0]) / 1024, (plain[0] - small[0]) / plain[0] * 100))
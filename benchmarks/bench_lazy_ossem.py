@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+""" compares import time and resident memory of data/ossem.py against the lazy data/lazy.py
+    store for a worker that only needs a single sysmon event.
+
+    python3 benchmarks/bench_lazy_ossem.py [--runs N]
+
+    memory is VmRSS from /proc/self/status before the import and after the lookup, in the same
+    process. ru_maxrss can't be used, a child starts out with the peak of the process that forked it """
+
+import argparse, os, sys, json, subprocess, statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# each snippet runs in a fresh interpreter so the import cost isn't hidden by sys.modules
+SNIPPET = """
+import time, json
+def rss_kb():
+    with open('/proc/self/status') as fh:
+        return int(next(line for line in fh if line.startswith('VmRSS:')).split()[1])
+before = rss_kb()
+start = time.perf_counter()
+from {module} import ossem
+imported = time.perf_counter()
+event = ossem['OSSEM']['data_dictionaries']['windows']['sysmon']['1']
+done = time.perf_counter()
+print(json.dumps({{'import': imported - start, 'lookup': done - imported, 'rss_kb': rss_kb() - before}}))
+"""
+
+def run(module, runs):
+    samples = []
+    for _ in range(runs + 1): # the first run writes the .pyc files and is thrown away
+        out = subprocess.check_output([sys.executable, '-c', SNIPPET.format(module=module)], cwd=ROOT)
+        samples.append(json.loads(out))
+    samples = samples[1:]
+    return {k: statistics.median(s[k] for s in samples) for k in samples[0]}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='benchmark data.ossem against data.lazy')
+    parser.add_argument('--runs', type=int, default=5, help='number of fresh interpreters per module')
+    args = parser.parse_args()
+
+    print("{:<12} {:>12} {:>12} {:>14}".format('module', 'import ms', 'lookup ms', 'rss delta KB'))
+    for module in ['data.ossem', 'data.lazy']:
+        r = run(module, args.runs)
+        print("{:<12} {:>12.2f} {:>12.3f} {:>14}".format(module, r['import'] * 1000, r['lookup'] * 1000, int(r['rss_kb'])))
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+""" micro benchmarks for convert_unicode_quotes_dashes on table cell text.
+
+    python3 benchmarks/bench_normalize.py [--cells 100000] [--rows 2000] [--runs 5]
+
+    compares the current implementation (ascii fast path, then a str.replace per mapped
+    character) with the old chain of seven str.replace calls and with a single str.translate
+    pass over a precomputed table, on ascii and non ascii cells. then times parse_dd_md on a
+    data dictionary with --rows rows where two thirds of the sample values contain an en dash """
+
+import argparse, os, sys, time, random
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bench_parser import data_dictionary_md
+from ossem_parser import OSSEMParser, convert_unicode_quotes_dashes, UNICODE_REPLACEMENTS
+
+def chained_replace(text):
+    """ convert_unicode_quotes_dashes before the ascii fast path """
+    return text.replace(u'’', "'").replace(u'–', '-').replace(u'—', '-').replace(u'“', '"')\
+            .replace(u'”', '"').replace(u'​', '').replace(u'…', '...')
+
+TABLE = str.maketrans(UNICODE_REPLACEMENTS)
+def translate(text):
+    return text.translate(TABLE)
+
+def cells(n, non_ascii):
+    words = ['process', 'guid', 'The', 'full', 'command', 'line', 'of', 'the', 'new', 'process', '4688']
+    marks = ['’', '–', '“', '”', '…', 'é']
+    rng = random.Random(1)
+    out = []
+    for i in range(n):
+        text = ' '.join(rng.choice(words) for _ in range(rng.randint(1, 12)))
+        if i % 100 < non_ascii:
+            pos = rng.randint(0, len(text))
+            text = text[:pos] + rng.choice(marks) + text[pos:]
+        out.append(text)
+    return out
+
+def best(f, runs):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        f()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='benchmark unicode punctuation normalization')
+    parser.add_argument('--cells', type=int, default=100000, help='table cells per micro benchmark')
+    parser.add_argument('--rows', type=int, default=2000, help='rows in the data dictionary parse benchmark')
+    parser.add_argument('--runs', type=int, default=5, help='runs per case, the best one is reported')
+    args = parser.parse_args()
+
+    impls = [('current', convert_unicode_quotes_dashes), ('chained replace', chained_replace), ('str.translate', translate)]
+    print("{:<22}".format('ns per cell') + ''.join('{:>18}'.format(name) for name, _ in impls))
+    for non_ascii in (0, 10, 50, 100):
+        texts = cells(args.cells, non_ascii)
+        for name, f in impls[1:]:
+            assert([f(t) for t in texts] == [convert_unicode_quotes_dashes(t) for t in texts]), name
+        row = [best(lambda: [f(t) for t in texts], args.runs) / args.cells * 1e9 for _, f in impls]
+        print("{:<22}".format('{}% non ascii'.format(non_ascii)) + ''.join('{:>18.0f}'.format(t) for t in row))
+
+    doc = data_dictionary_md(1, args.rows)
+    p = OSSEMParser()
+    print("parse_dd_md {} rows  {:.1f} ms".format(args.rows, best(lambda: p.parse_dd_md(doc), args.runs) * 1000))
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+""" per document overhead of parse_md_file against the parse_many batch api.
+
+    python3 benchmarks/bench_parse_many.py [--docs 5000] [--rows 3] [--runs 5]
+
+    parses --docs small synthetic data dictionaries one at a time with parse_dd_md (a new
+    renderer and Markdown engine per document) and as one batch with parse_many (one engine,
+    renderer reset between documents), and also times the engine setup on its own. every case
+    gets an untimed warm-up pass and the runs take turns, so neither side pays for a cold process """
+
+import argparse, os, sys, time, json
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bench_parser import data_dictionary_md
+from ossem_parser import OSSEMParser, DataDictionaryDictRenderer, Markdown
+
+def best(cases, runs):
+    """ (best time, result) for every case, after a warm-up pass of each, with the cases
+        interleaved run by run """
+    results = [f() for f in cases]
+    times = [[] for _ in cases]
+    for _ in range(runs):
+        for f, t in zip(cases, times):
+            start = time.perf_counter()
+            f()
+            t.append(time.perf_counter() - start)
+    return [(min(t), result) for t, result in zip(times, results)]
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='benchmark parse_many against parse_md_file')
+    parser.add_argument('--docs', type=int, default=5000, help='number of data dictionaries to parse')
+    parser.add_argument('--rows', type=int, default=3, help='data dictionary rows per document')
+    parser.add_argument('--runs', type=int, default=5, help='runs per case, the best one is reported')
+    args = parser.parse_args()
+
+    docs = [data_dictionary_md(n, args.rows) for n in range(args.docs)]
+    p = OSSEMParser()
+    (single, single_out), (batch, batch_out), (setup, _) = best([
+      lambda: [p.parse_dd_md(d) for d in docs],
+      lambda: list(p.parse_many(DataDictionaryDictRenderer, docs)),
+      lambda: [Markdown(escape=True, renderer=DataDictionaryDictRenderer()) for _ in docs]], args.runs)
+
+    per_doc = lambda t: t / args.docs * 1e6
+    print("{} documents of {} rows".format(args.docs, args.rows))
+    print("parse_md_file  {:>10.1f} ms {:>8.1f} us/doc".format(single * 1000, per_doc(single)))
+    print("parse_many     {:>10.1f} ms {:>8.1f} us/doc".format(batch * 1000, per_doc(batch)))
+    print("engine setup   {:>10.1f} ms {:>8.1f} us/doc (what parse_many saves)".format(setup * 1000, per_doc(setup)))
+    print("saved          {:>10.1f} us/doc ({:.1f}%)  identical output: {}".format(
+        per_doc(single - batch), (single - batch) / single * 100, json.dumps(single_out) == json.dumps(batch_out)))
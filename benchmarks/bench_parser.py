@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+""" parser throughput benchmarks on synthetic OSSEM shaped markdown.
+
+    python3 benchmarks/bench_parser.py [--rows 10,100,1000] [--files 100,1000] [--output results.json]
+    python3 benchmarks/bench_parser.py --compare before.json after.json
+
+    the renderer cases parse in memory documents with tables of --rows rows with each
+    of the DictRenderers. the tree cases write a synthetic OSSEM checkout of --files
+    files and run parse_ossem plus the json/yaml/xml serializers over it. every case
+    runs in a fresh process so peak RSS is per case. phase times are seconds spent in
+    read_file, in mistune itself, in the renderer callbacks and in serialization
+    (the callback timing wrappers add a little overhead to the renderer phase). """
+
+import argparse, os, sys, json, time, platform, resource, tempfile, shutil, subprocess, collections
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+RENDERERS = ['DataDictionaryDictRenderer', 'CIMDictRenderer', 'AttackDataSourceDictRenderer', 'DetectionDataModelDictRenderer']
+
+def data_dictionary_md(n, rows):
+    """ a data dictionary shaped like the sysmon ones """
+    table = '\n'.join('| field_{0}_{1} | Field{1} | {2} | Synthetic field {1} of event {0} | {3} |'.format(
+        n, i, 'integer' if i % 3 == 0 else 'string', i if i % 3 == 0 else 'value – {}'.format(i)) for i in range(rows))
+    return """---
+title: Event ID {0} - Synthetic event
+description: Synthetic event used for benchmarking.
+log.type: synthetic
+author: bench
+date: 01/01/2019
+---
+
+# Event ID {0}: Synthetic event
+
+## Description
+Synthetic event used for benchmarking the parser.[Synthetic Source](https://example.com/events/{0})
+
+## Event Log Illustration
+
+<img src="https://example.com/images/event-{0}.png" alt="Event {0} illustration" width="625" height="625">
+
+## Event XML
+
+```
+<Event xmlns="http://schemas.microsoft.com/win/2004/08/events/event">
+  <System>
+    <EventID>{0}</EventID>
+  </System>
+</Event>
+```
+
+## Data Dictionary
+
+| Standard Name | Field Name | Type | Description | Sample Value |
+|---|---|---|---|---|
+{1}
+""".format(n, table)
+
+def cim_md(n, rows):
+    """ a common information model schema shaped like process.md """
+    table = '\n'.join('| schema{0}_field_{1} | {2} | Synthetic field {1} ’s description | {3} |'.format(
+        n, i, 'integer' if i % 3 == 0 else 'string', i if i % 3 == 0 else 'value {}'.format(i)) for i in range(rows))
+    return """# Synthetic {0} Schema
+
+Event fields used to benchmark the parser.
+
+## Data Fields
+
+| Standard Name | Type | Description | Sample Value |
+|--------|---------|-------|-------|
+{1}
+""".format(n, table)
+
+def attack_data_sources_md(n, rows):
+    """ an attack data sources page shaped like attack_data_sources.md """
+    table = '\n'.join('|\tData Source {0} {1}\t|\tLogs tracking synthetic activity {1}\t|'.format(n, i) for i in range(rows))
+    return """# Data Sources
+
+Data sources names and association to techniques are determined by the MITRE ATTACK team.
+
+## Data Sources Definitions
+
+|\tData Source\t|\tDescription\t|
+|-----------------|----------------|
+{0}
+""".format(table)
+
+def detection_data_model_md(n, rows):
+    """ a detection data model shaped like object_relationships.md """
+    table = '\n'.join('| sub data source {1} | process | relationship_{0}_{1} | file |'.format(n, i) for i in range(rows))
+    return """# Data Object Relationships {0}
+
+|\tSub Data Sources\t|\tData Objects (Origin)\t|\tRelationship\t|\tData Objects (Destination)\t|
+|-------------------------------|---------------------|---------------------------------|---------------------------------|
+{1}
+""".format(n, table)
+
+GENERATORS = {
+  'DataDictionaryDictRenderer': data_dictionary_md,
+  'CIMDictRenderer': cim_md,
+  'AttackDataSourceDictRenderer': attack_data_sources_md,
+  'DetectionDataModelDictRenderer': detection_data_model_md
+}
+
+def write_tree(base, files, rows=20):
+    """ write a synthetic OSSEM checkout with about `files` markdown files, mostly data dictionaries """
+    ossem_dir = os.path.join(base, 'OSSEM')
+    layout = [
+      ('common_information_model', cim_md, max(1, files // 10)),
+      ('attack_data_sources', attack_data_sources_md, max(1, files // 50)),
+      ('detection_data_model', detection_data_model_md, max(1, files // 50)),
+    ]
+    layout.append(('data_dictionaries', data_dictionary_md, max(1, files - sum(count for _, _, count in layout))))
+    for section, generator, count in layout:
+        for n in range(count):
+            if section == 'data_dictionaries':
+                # 100 events per provider, 10 providers per platform like windows/sysmon
+                folder = os.path.join(ossem_dir, section, 'platform{}'.format(n // 1000), 'provider{}'.format(n // 100))
+                name = 'event-{}.md'.format(n)
+            else:
+                folder = os.path.join(ossem_dir, section)
+                name = '{}{}.md'.format(section, n)
+            os.makedirs(folder, exist_ok=True)
+            with open(os.path.join(folder, name), 'w') as fh:
+                fh.write(generator(n, rows))
+    return ossem_dir
+
+def timed_renderer(renderer, timings):
+    """ subclass of a DictRenderer that adds the time spent in every mistune callback to timings """
+    import mistune
+    def wrap(name, fn):
+        def timed(self, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(self, *args, **kwargs)
+            finally:
+                timings['render'] += time.perf_counter() - start
+                timings['callbacks.' + name] += 1
+        return timed
+    methods = {name: wrap(name, getattr(renderer, name)) for name in vars(mistune.Renderer)
+               if not name.startswith('_') and callable(getattr(renderer, name, None))}
+    return type('Timed' + renderer.__name__, (renderer,), methods)
+
+def make_parser(timings):
+    """ an OSSEMParser that records per phase timings """
+    from ossem_parser import OSSEMParser
+    wrapped = {}
+    class TimedOSSEMParser(OSSEMParser):
+        def read_file(self, filename):
+            start = time.perf_counter()
+            content = super().read_file(filename)
+            timings['read_file'] += time.perf_counter() - start
+            timings['bytes'] += len(content)
+            return content
+        def parse_md_file(self, renderer, markdown):
+            if renderer not in wrapped:
+                wrapped[renderer] = timed_renderer(renderer, timings)
+            render = timings['render']
+            start = time.perf_counter()
+            result = super().parse_md_file(wrapped[renderer], markdown)
+            timings['markdown'] += time.perf_counter() - start - (timings['render'] - render)
+            timings['docs'] += 1
+            return result
+    return TimedOSSEMParser()
+
+def finish(case, timings, elapsed):
+    timings = dict(timings)
+    case['seconds'] = elapsed
+    case['docs'] = timings.pop('docs', 0)
+    # every table calls table_row once for its header row
+    case['rows'] = timings.get('callbacks.table_row', 0) - timings.get('callbacks.table', 0)
+    case['bytes'] = timings.pop('bytes', 0)
+    case['docs_per_sec'] = case['docs'] / elapsed if elapsed else 0
+    case['rows_per_sec'] = case['rows'] / elapsed if elapsed else 0
+    case['phases'] = {k: v for k, v in timings.items() if not k.startswith('callbacks.')}
+    case['callbacks'] = {k[len('callbacks.'):]: v for k, v in timings.items() if k.startswith('callbacks.')}
+    case['peak_rss_kb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return case
+
+def run_renderer_case(renderer, rows, docs):
+    import ossem_parser
+    timings = collections.defaultdict(float)
+    parser = make_parser(timings)
+    markdown = [GENERATORS[renderer](n, rows) for n in range(docs)]
+    timings['bytes'] = sum(len(md) for md in markdown)
+    start = time.perf_counter()
+    for md in markdown:
+        parser.parse_md_file(getattr(ossem_parser, renderer), md)
+    return finish({'case': 'renderer', 'renderer': renderer, 'table_rows': rows}, timings, time.perf_counter() - start)
+
+def run_tree_case(files, rows):
+    from ossem_parser import dump_yaml
+    from ossem_xml import iter_xml
+    base = tempfile.mkdtemp()
+    try:
+        ossem_dir = write_tree(base, files, rows)
+        timings = collections.defaultdict(float)
+        parser = make_parser(timings)
+        start = time.perf_counter()
+        ossem = parser.parse_ossem(ossem_dir)
+        parsed = time.perf_counter()
+        timings['walk'] = parsed - start - timings['read_file'] - timings['markdown'] - timings['render']
+        for name, serialize in [('serialize_json', json.dumps), ('serialize_yaml', dump_yaml), ('serialize_xml', lambda o: ''.join(iter_xml(o)))]:
+            t = time.perf_counter()
+            serialize(ossem)
+            timings[name] = time.perf_counter() - t
+        return finish({'case': 'tree', 'files': files, 'table_rows': rows}, timings, time.perf_counter() - start)
+    finally:
+        shutil.rmtree(base)
+
+def in_fresh_process(fn, *args):
+    """ run a case in its own interpreter so RSS from one case doesn't leak into the next """
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+        return executor.submit(fn, *args).result()
+
+def metadata():
+    from ossem_parser import __version__
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {'version': __version__, 'commit': commit, 'python': platform.python_version(),
+            'platform': platform.platform(), 'time': time.strftime('%Y-%m-%dT%H:%M:%S')}
+
+def case_key(case):
+    return (case['case'], case.get('renderer'), case.get('files'), case['table_rows'])
+
+def describe(case):
+    if case['case'] == 'renderer':
+        return '{} rows={}'.format(case['renderer'], case['table_rows'])
+    return 'tree files={} rows={}'.format(case['files'], case['table_rows'])
+
+def compare(before, after):
+    """ print throughput and memory ratios between two result files """
+    with open(before) as fh:
+        before = {case_key(c): c for c in json.load(fh)['results']}
+    with open(after) as fh:
+        after = json.load(fh)['results']
+    print("{:<52} {:>12} {:>12} {:>8} {:>10}".format('case', 'docs/s old', 'docs/s new', 'ratio', 'rss ratio'))
+    for case in after:
+        old = before.get(case_key(case))
+        if old is None:
+            continue
+        ratio = case['docs_per_sec'] / old['docs_per_sec'] if old['docs_per_sec'] else 0
+        rss = case['peak_rss_kb'] / old['peak_rss_kb'] if old['peak_rss_kb'] else 0
+        print("{:<52} {:>12.1f} {:>12.1f} {:>7.2f}x {:>9.2f}x".format(describe(case), old['docs_per_sec'], case['docs_per_sec'], ratio, rss))
+
+def int_list(text):
+    return [int(v) for v in text.split(',') if v]
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='benchmark OSSEM parser throughput on synthetic markdown')
+    parser.add_argument('--rows', type=int_list, default=[10, 100, 1000], help='comma separated table sizes for the renderer cases (up to 10000)')
+    parser.add_argument('--files', type=int_list, default=[100, 1000], help='comma separated file counts for the tree cases (up to 100000)')
+    parser.add_argument('--tree-rows', type=int, default=20, help='table rows per file in the tree cases')
+    parser.add_argument('--renderers', type=str, default=','.join(RENDERERS), help='comma separated renderer class names')
+    parser.add_argument('--target-rows', type=int, default=20000, help='total table rows parsed per renderer case')
+    parser.add_argument('--output', '-o', type=str, help='write the results as json to this file')
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'), help='compare two result files and exit')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        sys.exit()
+
+    results = []
+    print("{:<52} {:>10} {:>12} {:>12} {:>10}".format('case', 'seconds', 'docs/s', 'rows/s', 'rss MB'))
+    cases = [(run_renderer_case, r, rows, max(1, args.target_rows // rows)) for r in args.renderers.split(',') for rows in args.rows]
+    cases += [(run_tree_case, files, args.tree_rows) for files in args.files]
+    for fn, *case_args in cases:
+        case = in_fresh_process(fn, *case_args)
+        results.append(case)
+        print("{:<52} {:>10.3f} {:>12.1f} {:>12.1f} {:>10.1f}".format(describe(case), case['seconds'], case['docs_per_sec'], case['rows_per_sec'], case['peak_rss_kb'] / 1024))
+        print("    " + '  '.join('{}={:.3f}s'.format(k, v) for k, v in sorted(case['phases'].items())))
+
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump({'meta': metadata(), 'results': results}, fh, indent=2)
+        print("wrote {}".format(args.output))
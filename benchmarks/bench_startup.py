@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+""" startup cost of every ossem_parser.py command, for scripts that call it over and over.
+
+    python3 benchmarks/bench_startup.py [--runs N] [--ossem tests/test_data/OSSEM]
+
+    a snapshot and json of --ossem are written first, then every command is run in a fresh
+    interpreter both as a script (python ossem_parser.py, which compiles the script from source
+    every time since __main__ never gets a .pyc) and as a module (python -m ossem_parser). the
+    wall time is the median of --runs runs. one more run under -X importtime gives the total
+    import time and which of the parsing dependencies (mistune, yaml, bs4) got imported """
+
+import argparse, os, sys, subprocess, statistics, tempfile, shutil, time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ['mistune', 'yaml', 'bs4', 'ossem_renderers']
+
+def commands(ossem_dir, tmp):
+    snapshot, json_file = os.path.join(tmp, 'ossem.snapshot'), os.path.join(tmp, 'ossem.json')
+    return [
+      ('query snapshot', ['query', '--snapshot', snapshot, '--subset', 'data_dictionaries.windows.sysmon']),
+      ('query snapshot --keys', ['query', '--snapshot', snapshot, '--subset', 'data_dictionaries', '--keys']),
+      ('query json', ['query', '--json', json_file, '--subset', 'data_dictionaries.windows.sysmon']),
+      ('export snapshot json', ['export', '--snapshot', snapshot, '--output', 'json']),
+      ('export snapshot yaml', ['export', '--snapshot', snapshot, '--output', 'yaml']),
+      ('parse json', ['parse', '--ossem', ossem_dir, '--output', 'json', '--no-cache']),
+      ('parse yaml', ['parse', '--ossem', ossem_dir, '--output', 'yaml', '--no-cache']),
+    ]
+
+def importtime(stderr):
+    """ total import time in ms and the names of the imported modules from -X importtime output """
+    total, modules = 0, set()
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if not cumulative.strip().isdigit():
+            continue # the header line
+        modules.add(name.strip())
+        if len(name) - len(name.lstrip()) == 1: # top level imports, the rest are counted in them
+            total += int(cumulative)
+    return total / 1000, modules
+
+def run(argv, env, runs):
+    subprocess.run(argv, cwd=ROOT, env=env, check=True, stdout=subprocess.DEVNULL) # writes the .pyc files
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(argv, cwd=ROOT, env=env, check=True, stdout=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    out = subprocess.run(argv[:1] + ['-X', 'importtime'] + argv[1:], cwd=ROOT, env=env, check=True,
+                         stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, universal_newlines=True)
+    total, modules = importtime(out.stderr)
+    return statistics.median(times) * 1000, total, [m for m in HEAVY if m in modules]
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='benchmark ossem_parser.py startup per command')
+    parser.add_argument('--runs', type=int, default=5, help='runs per command, the median is reported')
+    parser.add_argument('--ossem', type=str, default=os.path.join('tests', 'test_data', 'OSSEM'), help='OSSEM directory to parse (default the test fixture)')
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.pop('PYTHONDONTWRITEBYTECODE', None) # startup depends on the modules being cached
+    tmp = tempfile.mkdtemp()
+    try:
+        for fmt in ('snapshot', 'json'):
+            with open(os.path.join(tmp, 'ossem.{}'.format(fmt)), 'wb') as fh:
+                subprocess.run([sys.executable, 'ossem_parser.py', 'parse', '--ossem', args.ossem, '--output', fmt, '--no-cache'],
+                               cwd=ROOT, env=env, check=True, stdout=fh)
+        interpreter, _, _ = run([sys.executable, '-c', 'pass'], env, args.runs)
+        print("python -c pass {:.1f} ms\n".format(interpreter))
+        print("{:<24}{:>12}{:>12}{:>12}  {}".format('command', 'script ms', '-m ms', 'imports ms', 'parsing deps imported'))
+        for name, argv in commands(args.ossem, tmp):
+            script, _, _ = run([sys.executable, 'ossem_parser.py'] + argv, env, args.runs)
+            module, total, heavy = run([sys.executable, '-m', 'ossem_parser'] + argv, env, args.runs)
+            print("{:<24}{:>12.1f}{:>12.1f}{:>12.1f}  {}".format(name, script, module, total, ', '.join(heavy) or '-'))
+    finally:
+        shutil.rmtree(tmp)
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+""" times yaml output of the full OSSEM tree with the libyaml and pure python emitters.
+
+    python3 benchmarks/bench_yaml.py [--ossem ../OSSEM] [--runs N]
+
+    without --ossem the tree shipped in data/ossem.py is used """
+
+import argparse, os, sys, time, statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ossem_parser import OSSEMParser, dump_yaml, yaml_dumper
+import yaml
+
+def bench(ossem, engine, runs):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        out = dump_yaml(ossem, engine=engine)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), out
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='benchmark the yaml output engines')
+    parser.add_argument('--ossem', type=str, help='base directory containing the OSSEM project')
+    parser.add_argument('--runs', type=int, default=3, help='runs per engine')
+    args = parser.parse_args()
+
+    if args.ossem:
+        ossem = OSSEMParser().parse_ossem(args.ossem)
+    else:
+        from data.ossem import ossem
+
+    engines = ['python']
+    if yaml_dumper('auto') is not yaml.SafeDumper:
+        engines.append('libyaml')
+    else:
+        print("pyyaml was built without libyaml, only the python engine is measured")
+
+    results = {}
+    for engine in engines:
+        results[engine] = bench(ossem, engine, args.runs)
+        print("{:<8} {:>10.1f} ms {:>10} bytes".format(engine, results[engine][0] * 1000, len(results[engine][1])))
+    if 'libyaml' in results:
+        print("speedup  {:>10.1f}x  identical output: {}".format(results['python'][0] / results['libyaml'][0], results['python'][1] == results['libyaml'][1]))
@@ -0,0 +1,113 @@
+""" lazy loading replacement for data/ossem.py
+
+    from data.lazy import ossem
+    sysmon_1 = ossem['OSSEM']['data_dictionaries']['windows']['sysmon']['1']
+
+    instead of evaluating the whole OSSEM dict literal at import time this reads a
+    small index from data/ossem.store and only decompresses the subtree being indexed,
+    memoizing it so later lookups are plain dictionary accesses.
+
+    the store is rebuilt from data/ossem.py with:  python3 -m data.lazy """
+
+import os, json, zlib
+from collections.abc import Mapping
+
+STORE_MAGIC = b'OSSEMSTORE1\n'
+STORE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ossem.store')
+
+class LazyDict(Mapping):
+    """ read only mapping whose values are loaded from the store the first time they are accessed.
+        nested directories are LazyDicts themselves, leaf subtrees are plain python objects """
+    def __init__(self, store, entries):
+        self._store = store
+        self._entries = dict(entries)
+        self._loaded = {}
+    def __getitem__(self, key):
+        if key in self._loaded:
+            return self._loaded[key]
+        entry = self._entries[key]
+        if 'n' in entry:
+            value = LazyDict(self._store, entry['n'])
+        elif 'b' in entry:
+            value = self._store.load(*entry['b'])
+        else:
+            value = entry['v']
+        self._loaded[key] = value
+        return value
+    def __iter__(self):
+        return iter(self._entries)
+    def __len__(self):
+        return len(self._entries)
+    def __repr__(self):
+        return 'LazyDict({})'.format(list(self._entries))
+    def to_dict(self):
+        """ loads everything below this node and returns it as plain dictionaries """
+        return {k: v.to_dict() if isinstance(v, LazyDict) else v for k, v in self.items()}
+
+class OSSEMStore(object):
+    """ a store file is the magic line, a json index line and then the zlib compressed json
+        blobs for each subtree. index nodes are lists of [key, entry] pairs where entry is
+        {'n': [...]} for a nested node, {'b': [offset, length]} for a blob or {'v': value} """
+    def __init__(self, filename):
+        self.filename = filename
+        with open(filename, 'rb') as fh:
+            if fh.readline() != STORE_MAGIC:
+                raise ValueError("{} is not an OSSEM store".format(filename))
+            self.index = json.loads(fh.readline().decode('utf-8'))
+            self.blob_start = fh.tell()
+    def load(self, offset, length):
+        """ read and decode a single subtree from the store """
+        with open(self.filename, 'rb') as fh:
+            fh.seek(self.blob_start + offset)
+            return json.loads(zlib.decompress(fh.read(length)).decode('utf-8'))
+    def root(self):
+        return LazyDict(self, self.index)
+
+def write_store(tree, filename, max_blob=16384):
+    """ write a parsed OSSEM tree to a store file. dictionaries whose json is bigger
+        than max_blob bytes are split into their children so each one can be loaded
+        on its own, anything smaller is stored as a single compressed blob """
+    blobs = []
+    offset = 0
+    def add_blob(data):
+        nonlocal offset
+        blob = zlib.compress(data, 9)
+        blobs.append(blob)
+        offset += len(blob)
+        return {'b': [offset - len(blob), len(blob)]}
+    def node(tree):
+        entries = []
+        for k, v in tree.items():
+            if not isinstance(v, dict):
+                entries.append([k, {'v': v}])
+                continue
+            data = json.dumps(v, separators=(',', ':')).encode('utf-8')
+            if len(data) > max_blob:
+                entries.append([k, {'n': node(v)}])
+            else:
+                entries.append([k, add_blob(data)])
+        return entries
+    index = json.dumps(node(tree), separators=(',', ':')).encode('utf-8')
+    tmp = '{}.tmp'.format(filename)
+    with open(tmp, 'wb') as fh:
+        fh.write(STORE_MAGIC)
+        fh.write(index + b'\n')
+        for blob in blobs:
+            fh.write(blob)
+    os.replace(tmp, filename)
+
+def load(filename=STORE_FILE):
+    """ open a store file and return its lazily loaded root """
+    return OSSEMStore(filename).root()
+
+def __getattr__(name):
+    # the root is opened on first use so `python3 -m data.lazy` works without a store
+    if name == 'ossem':
+        globals()['ossem'] = load()
+        return globals()['ossem']
+    raise AttributeError("module {} has no attribute {}".format(__name__, name))
+
+if __name__ == '__main__':
+    from data.ossem import ossem as full_ossem
+    write_store(full_ossem, STORE_FILE)
+    print("wrote {} ({} bytes)".format(STORE_FILE, os.path.getsize(STORE_FILE)))
@@ -0,0 +1,105 @@
+""" reading an OSSEM tree straight from a .tar(.gz)/.zip or a git repository for parse_ossem """
+
+import os, re
+
+class ArchiveFile(str):
+    """ path of a file inside an ArchiveSource that carries its content along, so
+        read_file (also in a worker process) doesn't need to go back to the archive """
+    def __new__(cls, path, markdown):
+        self = str.__new__(cls, path)
+        self.markdown = markdown
+        return self
+    def __reduce__(self):
+        return ArchiveFile, (str(self), self.markdown)
+
+class ArchiveSource(object):
+    """ an OSSEM tree read from a .tar(.gz/.bz2/.xz) or .zip, or from a git repository at a
+        revision, without extracting it. every member is read in one sequential pass and
+        walk() mimics os.walk so parse_ossem gives the same tree as for a checked out directory.
+        the top folder is the single top level directory of the archive (like extracting it and
+        pointing --ossem at that directory) or the archive / repository name """
+    def __init__(self, location, revision=None):
+        self.location = location
+        self.files = {} # 'OSSEM/common_information_model/alert.md' -> bytes
+        import zipfile
+        name = os.path.basename(location.rstrip(os.sep))
+        if revision is not None or ArchiveSource.is_git(location):
+            members = self._read_git(location, revision or 'HEAD')
+            name = name[:-4] if name.endswith('.git') else name
+        elif zipfile.is_zipfile(location):
+            members = self._read_zip(location)
+        else:
+            members = self._read_tar(location)
+        tops = {m.split('/', 1)[0] for m in members}
+        if len(tops) == 1 and all('/' in m for m in members):
+            self.files = members
+        else:
+            self.files = {'{}/{}'.format(re.sub(r'(\.tar)?(\.[a-z0-9]+)?$', '', name), m): data for m, data in members.items()}
+
+    @staticmethod
+    def is_git(location):
+        """ a bare repository, checkouts are only read through git when given a revision """
+        return os.path.isdir(os.path.join(location, 'objects')) and os.path.isfile(os.path.join(location, 'HEAD'))
+
+    def _read_tar(self, location):
+        import tarfile
+        members = {}
+        with tarfile.open(location, 'r:*') as tar: # 'r:*' streams through the members in order
+            for member in tar:
+                if member.isfile():
+                    name = member.name[2:] if member.name.startswith('./') else member.name
+                    members[name] = tar.extractfile(member).read()
+        return members
+
+    def _read_zip(self, location):
+        import zipfile
+        with zipfile.ZipFile(location) as z:
+            return {info.filename: z.read(info) for info in z.infolist() if not info.is_dir()}
+
+    def _read_git(self, location, revision):
+        import subprocess
+        git = ['git', '-C', location]
+        tree = subprocess.run(git + ['ls-tree', '-r', '-z', revision], check=True, stdout=subprocess.PIPE).stdout
+        blobs = []
+        for entry in tree.split(b'\0'):
+            if entry:
+                info, path = entry.split(b'\t', 1)
+                mode, kind, sha = info.split()
+                if kind == b'blob' and mode != b'120000': # no symlinks or submodules
+                    blobs.append((path.decode('utf-8'), sha))
+        # one cat-file process streams every blob back in the order they were asked for
+        batch = subprocess.run(git + ['cat-file', '--batch'], check=True, input=b''.join(sha + b'\n' for _, sha in blobs),
+                               stdout=subprocess.PIPE).stdout
+        members = {}
+        offset = 0
+        for path, sha in blobs:
+            end = batch.index(b'\n', offset)
+            size = int(batch[offset:end].split()[2])
+            members[path] = batch[end + 1:end + 1 + size]
+            offset = end + 1 + size + 1
+        return members
+
+    def walk(self):
+        """ (path, dirs, files) for every directory top down like os.walk, paths use / """
+        tree = {}
+        for member in sorted(self.files):
+            node = tree
+            parts = member.split('/')
+            if any(p.startswith('.') for p in parts[:-1]):
+                continue # walk_ossem skips hidden directories
+            for part in parts[:-1]:
+                node = node.setdefault(part, {})
+            node.setdefault(None, []).append(parts[-1])
+        def walk(path, node):
+            dirs = [d for d in node if d is not None]
+            yield path, dirs, node.get(None, [])
+            for d in dirs:
+                yield from walk('{}/{}'.format(path, d), node[d])
+        for top, node in tree.items():
+            yield from walk(top, node)
+
+    def file(self, path):
+        """ the ArchiveFile for a path returned by walk(), decoded like open() would """
+        path = path.replace(os.sep, '/')
+        text = self.files[path].decode('utf-8')
+        return ArchiveFile(path, text.replace('\r\n', '\n').replace('\r', '\n'))
@@ -0,0 +1,92 @@
+""" on disk cache of parsed OSSEM files, parse_ossem looks every file up in it when given a cache_dir """
+
+import os, json, copy, functools
+
+from ossem_core import __version__, UNICODE_REPLACEMENTS
+
+PARSER_SOURCES = ('ossem_core.py', 'ossem_renderers.py') # the code a parse result depends on
+
+@functools.lru_cache(maxsize=None)
+def parser_fingerprint():
+    """ sha256 of the parser source files, so a cache written by other parser code isn't used """
+    import hashlib
+    digest = hashlib.sha256()
+    root = os.path.dirname(os.path.abspath(__file__))
+    for name in PARSER_SOURCES:
+        with open(os.path.join(root, name), 'rb') as fh:
+            digest.update(fh.read())
+    return digest.hexdigest()
+
+class ParseCache(object):
+    """ on disk cache of parsed OSSEM files for parse_ossem.
+        entries are keyed on the path relative to the OSSEM directory and
+        validated by mtime/size, falling back to a sha256 of the content so
+        touched or renamed files don't get parsed again. Files that aren't
+        seen during a run are dropped from the cache when it is saved.
+        the whole cache is thrown away when the parser code changed """
+    version = 1
+
+    def __init__(self, cache_dir, ossem_dir):
+        import hashlib # only parse runs with a cache need it, not every command
+        self.ossem_dir = ossem_dir
+        name = hashlib.sha1(os.path.abspath(ossem_dir).encode('utf-8')).hexdigest()[:16]
+        self.filename = os.path.join(cache_dir, 'parse-cache-{}.json'.format(name))
+        self.entries = {}
+        self.seen = {}
+        self.misses = {} # key -> (mtime, size, sha256) get() worked out for files that need parsing
+        try:
+            with open(self.filename) as fh:
+                cache = json.load(fh)
+            if cache.get('version') == self.version and cache.get('parser_version') == __version__ \
+               and cache.get('parser_fingerprint') == parser_fingerprint() \
+               and cache.get('unicode_replacements') == UNICODE_REPLACEMENTS:
+                self.entries = cache['entries']
+        except (OSError, ValueError, KeyError):
+            pass # missing or unreadable cache, start from scratch
+        self.by_hash = {(e['method'], e['sha256']): e for e in self.entries.values()}
+
+    def _stat(self, filename):
+        st = os.stat(filename)
+        return st.st_mtime_ns, st.st_size
+
+    def _sha256(self, filename):
+        import hashlib
+        with open(filename, 'rb') as fh:
+            return hashlib.sha256(fh.read()).hexdigest()
+
+    def get(self, method, filename):
+        """ returns the cached parse result for a file or None if it needs parsing. the stat
+            and hash of a miss are kept for put(), they are from before the file was parsed
+            so a file that changes in the meantime is looked at again on the next run """
+        key = os.path.relpath(filename, self.ossem_dir)
+        mtime, size = self._stat(filename)
+        entry = self.entries.get(key)
+        if entry and entry['method'] == method and entry['mtime'] == mtime and entry['size'] == size:
+            self.seen[key] = entry
+            return entry['result']
+        sha256 = self._sha256(filename)
+        entry = self.by_hash.get((method, sha256))
+        if entry is None:
+            self.misses[key] = mtime, size, sha256
+            return None
+        # content is unchanged (or the file was renamed) so only the stat info is stale
+        self.seen[key] = {'method': method, 'mtime': mtime, 'size': size, 'sha256': sha256,
+                          'result': copy.deepcopy(entry['result'])}
+        return self.seen[key]['result']
+
+    def put(self, method, filename, result):
+        """ store the parse result for a file get() missed """
+        key = os.path.relpath(filename, self.ossem_dir)
+        mtime, size, sha256 = self.misses.pop(key)
+        self.seen[key] = {'method': method, 'mtime': mtime, 'size': size, 'sha256': sha256, 'result': result}
+
+    def save(self, prune=True):
+        """ write the entries seen during this run back to disk, prune=False also keeps
+            the ones that weren't seen (the run only walked part of the tree) """
+        os.makedirs(os.path.dirname(self.filename), exist_ok=True)
+        tmp = '{}.{}.tmp'.format(self.filename, os.getpid())
+        with open(tmp, 'w') as fh:
+            json.dump({'version': self.version, 'parser_version': __version__, 'parser_fingerprint': parser_fingerprint(),
+                       'unicode_replacements': UNICODE_REPLACEMENTS,
+                       'entries': self.seen if prune else dict(self.entries, **self.seen)}, fh)
+        os.replace(tmp, self.filename)
@@ -0,0 +1,248 @@
+""" the ossem_parser.py commands: parse, query, export and test (serve lives in ossem_server) """
+
+import argparse, os, sys, json
+
+from ossem_core import OSSEMParser, ParseStats, FieldIndex, event_index, typed_tree, subset, subset_tree, tree_lookup, tree_root, \
+                       write_output, save_output, OUTPUT_EXTENSIONS
+
+def default_cache_dir():
+    """ where the CLI keeps its parse cache unless told otherwise """
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'ossem_parser')
+
+OUTPUT_FORMATS = ['json', 'jsonl', 'yaml', 'xml', 'snapshot', 'columnar', 'python'] # should we add markdown as output?
+
+def output_arguments(parser):
+    """ the output options shared by the parse and export commands """
+    parser.add_argument('--output', '-o', type=str, help='output format (json, jsonl, yaml, xml, snapshot, columnar, or python supported)', default='yaml')
+    parser.add_argument('--subset', '-s', type=str, action='append', help='output only a subset of OSSEM. example data_dictionaries.windows.sysmon. given more than once the subsets are output under their full path')
+    parser.add_argument('--yaml-engine', type=str, default='auto', choices=['auto', 'libyaml', 'python'], help='yaml emitter, auto uses libyaml when it is available')
+    parser.add_argument('--out', action='append', default=[], help='write the output to this file instead of stdout, the format comes from the extension (.json .yaml .xml .py .snapshot .npz). can be given more than once')
+    parser.add_argument('--typed-samples', action='store_true', help='convert every sample_value to its declared type (integer, long, boolean, ip, date, guid, hex) instead of only integers')
+
+def source_arguments(parser):
+    """ the options of commands that read a tree written by parse instead of parsing OSSEM """
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--snapshot', type=str, help='snapshot written with --output snapshot')
+    source.add_argument('--json', type=str, help='json written with --output json, like data/ossem.json')
+
+def output_format_of(args, valid_output=OUTPUT_FORMATS):
+    output_format = args.output.lower()
+    if not output_format in valid_output:
+        print("not a valid output format, must me one of {}".format(valid_output))
+        sys.exit()
+    return output_format
+
+def selected(ossem, subsets, output_format):
+    """ the part of a tree that gets written for --subset. columnar rows are labelled with
+        their full path so the subset stays inside the tree """
+    if not subsets:
+        return ossem
+    if output_format == 'columnar' or len(subsets) > 1:
+        return subset_tree(subsets, ossem)
+    return subset(subsets[0], ossem)
+
+def write_outputs(ossem, args, output_format):
+    """ write a tree to every --out file, the format comes from the extension and falls
+        back to --output, or to stdout when there aren't any """
+    if not args.out:
+        write_output(selected(ossem, args.subset, output_format), output_format, sys.stdout, args.yaml_engine)
+    for filename in args.out:
+        fmt = OUTPUT_EXTENSIONS.get(os.path.splitext(filename)[1].lower(), output_format)
+        save_output(selected(ossem, args.subset, fmt), filename, fmt, args.yaml_engine)
+
+def load_tree(args, subsets=None):
+    """ the tree from --snapshot or --json, only with the subsets in it when there are any.
+        only the subsets are decoded from a snapshot """
+    if args.snapshot:
+        from ossem_snapshot import Snapshot
+        with Snapshot(args.snapshot) as snapshot:
+            if subsets:
+                root = tree_root(snapshot.keys())
+                return subset_tree(subsets, snapshot, lambda s, snapshot: snapshot.get(root + s.split('.')))
+            return snapshot.get()
+    with open(args.json) as fh:
+        ossem = json.load(fh)
+    if not subsets:
+        return ossem
+    root = tree_root(ossem if isinstance(ossem, dict) else {})
+    return subset_tree(subsets, ossem, lambda s, ossem: tree_lookup(root + s.split('.'), ossem))
+
+def parse_main(argv=None):
+    """ parse an OSSEM checkout, archive or git repository and write it out """
+    parser = argparse.ArgumentParser(prog='ossem_parser.py parse', description='parse OSSEM markdown and write it as json, yaml, xml, a snapshot or columns')
+    parser.add_argument('--ossem', type=str, required=True, help='base directory containing the OSSEM project, a .tar(.gz) or .zip of it or a bare git repository')
+    parser.add_argument('--revision', type=str, help='read --ossem as a git repository at this revision (branch, tag or commit)')
+    output_arguments(parser)
+    parser.add_argument('--find-field', '-f', type=str, help='show every data dictionary and CIM schema with a field of this name. example ProcessGuid or process_guid')
+    parser.add_argument('--cache-dir', type=str, help='directory for the parse cache (default {})'.format(default_cache_dir()))
+    parser.add_argument('--no-cache', action='store_true', help='parse every file and leave the parse cache alone')
+    parser.add_argument('--event-index', action='store_true', help="add an 'event_index' of (platform, provider, event id) -> data dictionary next to OSSEM")
+    parser.add_argument('--jobs', '-j', type=int, default=1, help='number of parser processes to run, 0 uses every cpu (default 1)')
+    parser.add_argument('--output-dir', type=str, help='write every document to its own file in this directory, mirroring the OSSEM layout, in the --output format (json, yaml, xml or python)')
+    parser.add_argument('--watch', action='store_true', help='keep running and rewrite the --out files whenever an OSSEM file changes')
+    parser.add_argument('--stats', action='store_true', help='print parse statistics and the slowest files to stderr')
+    parser.add_argument('--profile', type=str, help='write a cProfile/pstats dump of the parse to this file (only covers the main process with --jobs)')
+    args = parser.parse_args(argv)
+    output_format = output_format_of(args)
+
+    if args.watch and not args.out:
+        print("--watch needs at least one --out file to keep up to date")
+        sys.exit()
+    if args.watch:
+        from ossem_archive import ArchiveSource
+        if args.revision or not os.path.isdir(args.ossem) or ArchiveSource.is_git(args.ossem):
+            print("--watch needs --ossem to be a checked out directory")
+            sys.exit()
+    unwatched = [option for option, value in (('--output-dir', args.output_dir), ('--stats', args.stats), ('--profile', args.profile),
+                                              ('--find-field', args.find_field)) if value]
+    if args.watch and (unwatched or output_format == 'jsonl'):
+        print("--watch only rewrites --out files, it can't be used with {}".format(', '.join(unwatched) or '--output jsonl'))
+        sys.exit()
+    if args.output_dir:
+        from ossem_shards import SHARD_EXTENSIONS, write_shards
+        if output_format not in SHARD_EXTENSIONS:
+            print("--output-dir can write {} files".format(', '.join(SHARD_EXTENSIONS)))
+            sys.exit()
+
+    workers = args.jobs if args.jobs > 0 else os.cpu_count()
+    parser = OSSEMParser()
+    cache_dir = None if args.no_cache else (args.cache_dir or default_cache_dir())
+    if args.watch:
+        def rewrite(ossem, changed=()):
+            if args.typed_samples:
+                ossem = typed_tree(ossem)
+            if args.event_index:
+                ossem = dict(ossem, event_index=event_index(ossem)) # the watcher's tree is left alone
+            write_outputs(ossem, args, output_format)
+            for p in changed:
+                print("updated {}".format(p), file=sys.stderr)
+        from ossem_watch import OSSEMWatcher
+        watcher = OSSEMWatcher(args.ossem, parser=parser, workers=workers)
+        rewrite(watcher.ossem)
+        print("watching {} for changes".format(args.ossem), file=sys.stderr)
+        try:
+            watcher.watch(rewrite)
+        except KeyboardInterrupt:
+            sys.exit()
+    stats = ParseStats() if args.stats else None
+    if args.profile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    in_subset = lambda path: not args.subset or any(path == s or path.startswith(s + '.') for s in args.subset)
+    if args.output_dir:
+        documents = parser.iter_ossem(args.ossem, workers=workers, cache_dir=cache_dir, stats=stats, revision=args.revision, subsets=args.subset, keys=True, typed=args.typed_samples)
+        try:
+            written, unchanged, removed = write_shards(((k, d) for k, d in documents if in_subset('.'.join(k))),
+                                                       args.output_dir, output_format, workers, args.yaml_engine, args.subset)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            sys.exit(1)
+        print("{}: {} written, {} unchanged, {} removed".format(args.output_dir, written, unchanged, removed), file=sys.stderr)
+    elif output_format == 'jsonl':
+        # stream one record per document as it gets parsed instead of building the whole tree
+        for path, data in parser.iter_ossem(args.ossem, workers=workers, cache_dir=cache_dir, stats=stats, revision=args.revision, subsets=args.subset, typed=args.typed_samples):
+            if in_subset(path):
+                print(json.dumps({'path': path, 'data': data}), flush=True)
+    else:
+        ossem = parser.parse_ossem(args.ossem, workers=workers, cache_dir=cache_dir, stats=stats, revision=args.revision, subsets=None if args.find_field else args.subset, events=args.event_index, typed=args.typed_samples)
+    if args.profile:
+        profiler.disable()
+        profiler.dump_stats(args.profile)
+    if stats:
+        print(stats.summary(), file=sys.stderr)
+    if output_format == 'jsonl' or args.output_dir:
+        return
+    if args.find_field:
+        print(json.dumps(FieldIndex(ossem).find(args.find_field), indent=2))
+        return
+    write_outputs(ossem, args, output_format)
+
+def query_main(argv=None):
+    """ look up subsets, keys and fields in a tree written by parse. this never imports
+        mistune or yaml so scripts can call it over and over for a few lookups """
+    parser = argparse.ArgumentParser(prog='ossem_parser.py query', description='look up parts of a snapshot or json written by parse as json, without parsing OSSEM')
+    source_arguments(parser)
+    parser.add_argument('--subset', '-s', type=str, action='append', help='print only a subset of OSSEM. example data_dictionaries.windows.sysmon. given more than once the subsets are printed under their full path')
+    parser.add_argument('--keys', action='store_true', help='print the keys of the subset (or of OSSEM) instead of its content')
+    parser.add_argument('--find-field', '-f', type=str, help='show every data dictionary and CIM schema with a field of this name. example ProcessGuid or process_guid')
+    parser.add_argument('--indent', type=int, help='indent the json by this many spaces')
+    args = parser.parse_args(argv)
+
+    if args.snapshot:
+        from ossem_snapshot import Snapshot
+        source = Snapshot(args.snapshot)
+        get, keys = source.get, source.keys
+    else:
+        with open(args.json) as fh:
+            source = json.load(fh)
+        get = lambda path: tree_lookup(path, source)
+        keys = lambda path: list(get(path)) if isinstance(get(path), dict) else []
+    lookup = keys if args.keys else get
+    root = tree_root(keys([]))
+    try:
+        if args.find_field:
+            result = FieldIndex(get([])).find(args.find_field)
+        elif args.subset and len(args.subset) > 1:
+            result = subset_tree(args.subset, None, lambda s, _: lookup(root + s.split('.')))
+        else:
+            result = lookup(root + (args.subset[0].split('.') if args.subset else []))
+    except KeyError:
+        print("Invalid subset doesn't exist in OSSEM data model", file=sys.stderr)
+        sys.exit(1)
+    print(json.dumps(result, indent=args.indent))
+
+def export_main(argv=None):
+    """ write a tree written by parse in other formats without parsing OSSEM again """
+    parser = argparse.ArgumentParser(prog='ossem_parser.py export', description='convert a snapshot or json written by parse to another output format')
+    source_arguments(parser)
+    output_arguments(parser)
+    args = parser.parse_args(argv)
+    output_format = output_format_of(args, [f for f in OUTPUT_FORMATS if f != 'jsonl'])
+    try:
+        ossem = load_tree(args, args.subset)
+    except KeyError:
+        print("Invalid subset doesn't exist in OSSEM data model", file=sys.stderr)
+        sys.exit(1)
+    if args.typed_samples:
+        errors = []
+        ossem = typed_tree(ossem, errors)
+        for e in errors:
+            print("{} {} ({}) {!r}: {}".format(e['path'], e['field'], e['type'], e['value'], e['error']), file=sys.stderr)
+    write_outputs(ossem, args, output_format)
+
+def test_main(argv=None):
+    """ run the test suite, from the top of the repository """
+    import unittest
+    root = os.path.dirname(os.path.abspath(__file__))
+    unittest.main(module=None, argv=['ossem_parser.py test', 'discover', '-s', os.path.join(root, 'tests'), '-t', root] + list(argv or []))
+
+COMMANDS = {
+  'parse': 'parse an OSSEM checkout, archive or git repository (the default)',
+  'query': 'look up subsets, keys and fields in a snapshot or json without parsing',
+  'export': 'convert a snapshot or json to another output format',
+  'serve': 'serve lookups over HTTP',
+  'test': 'run the test suite (the default without any arguments)',
+}
+
+def main(argv=None):
+    """ ossem_parser.py <command> [options]. every command only imports what it needs, only
+        parse loads mistune and only yaml output loads pyyaml. arguments without a command
+        are parse options, like before there were commands """
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv:
+        argv = ['test']
+    elif argv[0] in ('-h', '--help'):
+        print("usage: ossem_parser.py <command> [options]\n\ncommands:")
+        for command, help in COMMANDS.items():
+            print("  {:<8}{}".format(command, help))
+        print("\nossem_parser.py <command> --help shows the options of a command")
+        return
+    elif argv[0] not in COMMANDS:
+        argv = ['parse'] + argv
+    command, argv = argv[0], argv[1:]
+    if command == 'serve':
+        from ossem_server import main as serve_main
+        return serve_main(argv)
+    return {'parse': parse_main, 'query': query_main, 'export': export_main, 'test': test_main}[command](argv)
@@ -0,0 +1,105 @@
+""" column oriented export of every data dictionary field row
+
+    the rows are written to a NumPy .npz archive without needing numpy, so pandas can load
+    every column with a single vectorized read per column:
+
+      import numpy as np, pandas as pd
+      z = np.load('fields.npz')
+      df = pd.DataFrame({c: pd.Categorical.from_codes(z[c], z[c + '__strings']) for c in z['columns']})
+
+    every column is dictionary encoded like an Arrow dictionary array: '<column>' holds int32
+    codes (-1 for a missing value) into '<column>__strings', the column's unique strings in
+    order of first appearance. 'columns' lists the column names. sample values are stored as
+    strings, integers the parser converted are written back out with str().
+    read_columnar() reads the archive back with the standard library only. """
+
+import ast, struct, zipfile, array, sys
+
+COLUMNS = ['platform', 'provider', 'event', 'path', 'standard_name', 'field_name', 'type', 'description', 'sample_value']
+NPY_MAGIC = b'\x93NUMPY\x01\x00'
+
+def data_dictionary_rows(docs):
+    """ a tuple of COLUMNS for every field of every data dictionary in (dotted path, parsed document)
+        pairs, the paths are the ones iter_ossem yields: data_dictionaries.<platform>[.<provider>...].<event> """
+    for path, doc in docs:
+        parts = path.split('.')
+        if parts[0] != 'data_dictionaries' or len(parts) < 3 or not hasattr(doc, 'get'):
+            continue
+        fields = doc.get('data_dictionary')
+        if not hasattr(fields, 'items'):
+            continue
+        provider = parts[2] if len(parts) > 3 else None
+        for standard_name, field in fields.items():
+            sample = field.get('sample_value')
+            yield (parts[1], provider, parts[-1], path, standard_name, field.get('field_name'),
+                   field.get('type'), field.get('description'), None if sample is None else str(sample))
+
+def tree_documents(ossem, folders=None):
+    """ (dotted path, document) pairs for the data dictionaries of a parsed tree """
+    if folders is None:
+        return tree_documents(ossem.get('OSSEM', ossem).get('data_dictionaries') or {}, ['data_dictionaries'])
+    docs = []
+    for key, value in ossem.items():
+        if hasattr(value, 'get') and hasattr(value.get('data_dictionary'), 'items'):
+            docs.append(('.'.join(folders + [key]), value))
+        elif isinstance(value, dict):
+            docs.extend(tree_documents(value, folders + [key]))
+    return docs
+
+def _npy(descr, shape, data):
+    header = "{{'descr': '{}', 'fortran_order': False, 'shape': ({},), }}".format(descr, shape)
+    # the header is padded with spaces so the data starts on a 64 byte boundary
+    padding = 64 - (len(NPY_MAGIC) + 2 + len(header) + 1) % 64
+    header = (header + ' ' * (padding % 64) + '\n').encode('latin-1')
+    return NPY_MAGIC + struct.pack('<H', len(header)) + header + data
+
+def _int32_npy(values):
+    codes = array.array('i', values)
+    if sys.byteorder != 'little':
+        codes.byteswap()
+    return _npy('<i4', len(codes), codes.tobytes())
+
+def _strings_npy(strings):
+    width = max([len(s) for s in strings] + [1])
+    data = b''.join(s.ljust(width, '\0').encode('utf-32-le') for s in strings)
+    return _npy('<U{}'.format(width), len(strings), data)
+
+def write_columnar(rows, fh, columns=COLUMNS):
+    """ write rows (tuples in the order of columns) to a binary file object as an .npz archive """
+    codes = [[] for _ in columns]
+    tables = [{} for _ in columns]
+    for row in rows:
+        for value, col_codes, table in zip(row, codes, tables):
+            col_codes.append(-1 if value is None else table.setdefault(value, len(table)))
+    with zipfile.ZipFile(fh, 'w', zipfile.ZIP_DEFLATED) as z:
+        z.writestr('columns.npy', _strings_npy(columns))
+        for name, col_codes, table in zip(columns, codes, tables):
+            z.writestr('{}.npy'.format(name), _int32_npy(col_codes))
+            z.writestr('{}__strings.npy'.format(name), _strings_npy(list(table)))
+
+def _read_npy(data):
+    if data[:len(NPY_MAGIC)] != NPY_MAGIC:
+        raise ValueError("not a version 1.0 npy array")
+    header_len, = struct.unpack_from('<H', data, len(NPY_MAGIC))
+    start = len(NPY_MAGIC) + 2 + header_len
+    header = ast.literal_eval(data[len(NPY_MAGIC) + 2:start].decode('latin-1'))
+    count, = header['shape']
+    if header['descr'] == '<i4':
+        values = array.array('i')
+        values.frombytes(data[start:start + 4 * count])
+        if sys.byteorder != 'little':
+            values.byteswap()
+        return values.tolist()
+    width = int(header['descr'][2:])
+    text = data[start:start + 4 * width * count].decode('utf-32-le')
+    return [text[i * width:(i + 1) * width].rstrip('\0') for i in range(count)]
+
+def read_columnar(filename):
+    """ read an archive written by write_columnar back into {column: [values]} using only the standard library """
+    with zipfile.ZipFile(filename) as z:
+        columns = _read_npy(z.read('columns.npy'))
+        out = {}
+        for name in columns:
+            strings = _read_npy(z.read('{}__strings.npy'.format(name)))
+            out[name] = [None if c < 0 else strings[c] for c in _read_npy(z.read('{}.npy'.format(name)))]
+    return out
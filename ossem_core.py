@@ -0,0 +1,860 @@
+""" the OSSEM markdown parser: OSSEMParser walks an OSSEM checkout into a tree of python
+    dictionaries, plus the lookups (subset, FieldIndex, event_index) and output writers for it.
+    ossem_parser re-exports all of it, so it is usually imported from there """
+
+import os, re, sys, json, collections.abc, functools, time, bisect, fnmatch, importlib
+
+__version__ = '0.0.1'
+__author__ = 'Zack Payton <zack.payton@westward.ai>'
+
+def detect_language(code):
+    """ this simple function does its best
+        to detect the event output...
+        generally xml or json """
+    code = code.strip().rstrip()
+    if code.startswith('<'):
+        return 'xml'
+    if code.startswith('{'):
+        return 'json'
+    else:
+        return 'unknown'
+
+HTML_TAG = re.compile(r"""<([A-Za-z][A-Za-z0-9-]*)((?:\s+[^\s"'<>/=]+(?:\s*=\s*(?:"[^"]*"|'[^']*'|[^\s"'=<>`]+))?)*)\s*/?>""")
+HTML_ATTR = re.compile(r"""([^\s"'<>/=]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'=<>`]+)))?""")
+
+def html_attrs(html, tag):
+    """ attributes of the first <tag> in a snippet of inline html as a dict, names are
+        lower cased and values unescaped like BeautifulSoup does. this only understands
+        well formed start tags, when there isn't one BeautifulSoup is tried if it is
+        installed and None is returned if that doesn't find the tag either """
+    for m in HTML_TAG.finditer(html):
+        if m.group(1).lower() == tag:
+            from html import unescape as html_unescape
+            return {a.group(1).lower(): html_unescape(next((v for v in a.group(2, 3, 4) if v is not None), ''))
+                    for a in HTML_ATTR.finditer(m.group(2))}
+    try:
+        from bs4 import BeautifulSoup # optional, only needed for markup the regex can't read
+    except ImportError:
+        return None
+    element = BeautifulSoup(html, 'html.parser').find(tag)
+    return dict(element.attrs) if element is not None else None
+
+UNICODE_REPLACEMENTS = { # non ascii character -> ascii replacement, extend with add_unicode_replacements
+  '\u2019': "'", '\u2013': '-', '\u2014': '-', '\u201C': '"', '\u201D': '"', '\u200B': '', '\u2026': '...'
+}
+UNICODE_REPLACE_STEPS = tuple(UNICODE_REPLACEMENTS.items())
+
+def add_unicode_replacements(mapping):
+    """ normalize more unicode punctuation in convert_unicode_quotes_dashes, mapping is
+        {character: replacement} and overrides the defaults. only non ascii characters can be
+        mapped since ascii text is returned untouched """
+    global UNICODE_REPLACE_STEPS
+    for char in mapping:
+        if char.isascii():
+            raise ValueError("{!r} is ascii, only non ascii characters can be replaced".format(char))
+    UNICODE_REPLACEMENTS.update(mapping)
+    UNICODE_REPLACE_STEPS = tuple(UNICODE_REPLACEMENTS.items())
+
+def convert_unicode_quotes_dashes(text):
+    """ this function replaces unicode characters with their ascii counterparts (UNICODE_REPLACEMENTS) """
+    if text.isascii(): # most table cells, nothing to replace
+        return text
+    for char, replacement in UNICODE_REPLACE_STEPS:
+        text = text.replace(char, replacement)
+    return text
+
+@functools.lru_cache(maxsize=4096)
+def lower_under_joined(text):
+    """ silly function to convert dictionary keys to a more 'pythonic' representation.
+        the same few headers show up in every file so results are cached and interned,
+        which also makes every parsed dict share the same key strings """
+    return sys.intern('_'.join(list(map(lambda w: w.lower(), text.split(' '))))) # this will convert something like 'Blase Blah' to 'blase_blah'
+
+SAMPLE_TYPES = { # declared field type (lower cased) -> the SAMPLE_CONVERTERS entry for its sample values
+  'integer': 'integer', 'int': 'integer', 'long': 'integer', 'bigint': 'integer',
+  'boolean': 'boolean', 'bool': 'boolean', 'ip': 'ip', 'date': 'date', 'datetime': 'date',
+  'guid': 'guid', 'uuid': 'guid', 'hex': 'hex'
+}
+INTEGER_SAMPLES = {'integer': 'integer'} # what the renderers always convert, the rest is up to typed_tree()
+
+BOOLEANS = {'true': True, 'false': False, 'yes': True, 'no': False, '1': True, '0': False}
+GUID = re.compile(r'\{?([0-9a-f]{8})-([0-9a-f]{4})-([0-9a-f]{4})-([0-9a-f]{4})-([0-9a-f]{12})\}?', re.I)
+HEX = re.compile(r'(?:0x)?([0-9a-f]+)', re.I)
+DATE_FORMATS = ('%m/%d/%Y %H:%M:%S', '%m/%d/%y %H:%M:%S', '%m/%d/%Y %H:%M', '%m/%d/%y %H:%M', '%m/%d/%Y', '%m/%d/%y',
+                '%m/%d/%Y %I:%M:%S %p', '%m/%d/%Y %I:%M %p', '%Y/%m/%d %H:%M:%S')
+
+def _boolean(value):
+    try:
+        return BOOLEANS[value.strip().lower()]
+    except KeyError:
+        raise ValueError("not a boolean")
+
+def _ip(value):
+    import ipaddress
+    return str(ipaddress.ip_address(value.strip()))
+
+def _guid(value):
+    m = GUID.fullmatch(value.strip())
+    if m is None:
+        raise ValueError("not a guid")
+    return '-'.join(m.groups()).lower()
+
+def _hex(value):
+    m = HEX.fullmatch(value.strip())
+    if m is None:
+        raise ValueError("not a hex number")
+    return int(m.group(1), 16)
+
+def _date_converter():
+    """ date converter for one column, the format that matched last is tried first
+        since a table tends to write all of its dates the same way """
+    import datetime
+    formats = list(DATE_FORMATS)
+    def convert(value):
+        value = value.strip()
+        try:
+            return datetime.datetime.fromisoformat(value.replace('Z', '+00:00')).isoformat()
+        except ValueError:
+            pass
+        for i, f in enumerate(formats):
+            try:
+                date = datetime.datetime.strptime(value, f)
+            except ValueError:
+                continue
+            formats.insert(0, formats.pop(i))
+            return date.isoformat()
+        raise ValueError("not a date in a known format")
+    return convert
+
+SAMPLE_CONVERTERS = { # name -> function returning the converter for one column of sample values
+  'integer': lambda: functools.partial(int, base=0),
+  'boolean': lambda: _boolean,
+  'ip': lambda: _ip, # normalized, 2001:db8::1 instead of 2001:0db8:0:0:0:0:0:1
+  'date': _date_converter, # iso 8601
+  'guid': lambda: _guid, # lower case 8-4-4-4-12 without braces
+  'hex': lambda: _hex
+}
+
+def coerce_samples(fields, types=SAMPLE_TYPES):
+    """ convert the sample_value of every row in a table of fields ({name: row}) to its declared
+        type in place. the rows are grouped by type first so every column gets one converter.
+        types maps the declared types to convert to SAMPLE_CONVERTERS. empty samples become None,
+        as do ones that don't convert and those are returned as [{'field', 'type', 'value', 'error'}] """
+    columns = {}
+    for name, row in fields.items():
+        declared = row.get('type') if isinstance(row, dict) else None
+        if isinstance(declared, str) and declared.lower() in types:
+            columns.setdefault(types[declared.lower()], []).append((name, row))
+    errors = []
+    for kind, rows in columns.items():
+        convert = SAMPLE_CONVERTERS[kind]()
+        for name, row in rows:
+            value = row.get('sample_value')
+            if isinstance(value, str) and value.strip():
+                try:
+                    row['sample_value'] = convert(value)
+                    continue
+                except ValueError as e:
+                    error = str(e)
+            elif value is None or isinstance(value, (str, int, float)): # empty or converted already
+                row['sample_value'] = None if isinstance(value, str) else value
+                continue
+            else:
+                error = "not a {}".format(kind)
+            errors.append({'field': name, 'type': row['type'], 'value': value, 'error': error})
+            row['sample_value'] = None
+    return errors
+
+def _fields_table(tree):
+    return len(tree) > 0 and all(isinstance(row, dict) for row in tree.values()) and any('type' in row for row in tree.values())
+
+def typed_tree(tree, errors=None, path=()):
+    """ returns a copy of a parsed tree where the sample values in every table of fields are
+        native values of their declared type (see SAMPLE_TYPES): ints, booleans and normalized
+        ip, date and guid strings. the ones that don't convert become None and are appended
+        to errors with the dotted path of their table """
+    if isinstance(tree, dict):
+        tree = {k: typed_tree(v, errors, path + (k,)) for k, v in tree.items()}
+        if _fields_table(tree):
+            tree = {k: dict(row) for k, row in tree.items()}
+            for error in coerce_samples(tree):
+                if errors is not None:
+                    errors.append(dict(error, path='.'.join(path)))
+        return tree
+    if isinstance(tree, list):
+        return [typed_tree(v, errors, path) for v in tree]
+    return tree
+
+RENDERER_NAMES = ('DictRenderer', 'CIMDictRenderer', 'DataDictionaryDictRenderer', 'AttackDataSourceDictRenderer',
+                  'DetectionDataModelDictRenderer', 'Markdown')
+
+def __getattr__(name):
+    """ the renderers live in ossem_renderers so mistune is only imported once something
+        parses markdown, they can still be imported from here """
+    if name in RENDERER_NAMES:
+        import ossem_renderers
+        return getattr(ossem_renderers, name)
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+class FieldIndex(object):
+    """ inverted index over a parsed OSSEM tree (the output of parse_ossem) so questions like
+        'which event sources have a ProcessGuid field' are dictionary lookups instead of a walk.
+        data dictionary rows are indexed on both their field name and standard name and CIM
+        fields on their name. every hit is a dict with the dotted path of the document it came from """
+    def __init__(self, ossem):
+        self.fields = {} # data dictionary field name -> rows
+        self.standard_names = {} # data dictionary standard name -> rows
+        self.cim_fields = {} # CIM field name -> schemas
+        ossem = ossem.get('OSSEM', ossem)
+        self._index_data_dictionaries(ossem.get('data_dictionaries') or {}, ['data_dictionaries'])
+        for schema, cim in (ossem.get('common_information_model') or {}).items():
+            if isinstance(cim, dict):
+                for name, field in (cim.get('data_fields') or {}).items():
+                    self.cim_fields.setdefault(name, []).append({
+                      'path': 'common_information_model.{}'.format(schema),
+                      'schema': cim.get('name'),
+                      'type': field.get('type'),
+                      'description': field.get('description')
+                    })
+
+    def _index_data_dictionaries(self, tree, folders):
+        for key, value in tree.items():
+            if not isinstance(value, dict):
+                continue
+            if not isinstance(value.get('data_dictionary'), dict):
+                self._index_data_dictionaries(value, folders + [key])
+                continue
+            path = '.'.join(folders + [key])
+            for standard_name, field in value['data_dictionary'].items():
+                row = {
+                  'path': path,
+                  'field_name': field.get('field_name'),
+                  'standard_name': standard_name,
+                  'type': field.get('type'),
+                  'description': field.get('description')
+                }
+                self.standard_names.setdefault(standard_name, []).append(row)
+                if row['field_name']:
+                    self.fields.setdefault(row['field_name'], []).append(row)
+
+    def find_field(self, name):
+        """ data dictionary rows whose event field is called name """
+        return self.fields.get(name, [])
+    def find_standard_name(self, name):
+        """ data dictionary rows that map to the standard name """
+        return self.standard_names.get(name, [])
+    def find_cim_field(self, name):
+        """ CIM schemas that define the field """
+        return self.cim_fields.get(name, [])
+    def find(self, name):
+        """ everything we know about a name, matched as a field name, standard name or CIM field """
+        rows = self.find_field(name) + [r for r in self.find_standard_name(name) if r['field_name'] != name]
+        return {'data_dictionaries': rows, 'common_information_model': self.find_cim_field(name)}
+
+def event_index(ossem):
+    """ normalized event id lookup table for the data dictionaries of a parsed OSSEM tree:
+        {platform: {provider: {'event_ids': [sorted numeric ids], 'events': {'4688': record}}}}
+        so index[platform][provider]['events'][event_id] is the parsed data dictionary without
+        walking the tree. the provider is the folder below the platform (data_dictionaries.windows.security.events
+        is windows/security) and the records are the same objects as the ones in the tree """
+    index = {}
+    ossem = ossem.get('OSSEM', ossem)
+    def walk(tree, platform, provider):
+        for key, value in tree.items():
+            if not isinstance(value, dict):
+                continue
+            if key.isnumeric() and isinstance(value.get('data_dictionary'), dict):
+                events = index.setdefault(platform, {}).setdefault(provider, {'event_ids': [], 'events': {}})
+                events['events'][key] = value
+            else:
+                walk(value, platform, provider or key)
+    for platform, tree in (ossem.get('data_dictionaries') or {}).items():
+        if isinstance(tree, dict):
+            walk(tree, platform, None)
+    for providers in index.values():
+        for events in providers.values():
+            events['event_ids'] = sorted(int(k) for k in events['events'])
+    return index
+
+class Record(collections.abc.Mapping):
+    """ read only, slotted stand in for a small dict of scalars like a data dictionary row.
+        records with the same keys share one keys tuple so a row costs an object and a
+        tuple of values instead of a dict. see compact_tree() and expand_tree() """
+    __slots__ = ('_keys', '_values')
+    shared_keys = {} # keys tuple -> the one instance of it every record uses
+
+    def __init__(self, keys, values):
+        self._keys = Record.shared_keys.setdefault(keys, keys)
+        self._values = values
+    def __getitem__(self, key):
+        try:
+            return self._values[self._keys.index(key)]
+        except ValueError:
+            raise KeyError(key)
+    def __iter__(self):
+        return iter(self._keys)
+    def __len__(self):
+        return len(self._keys)
+    def __repr__(self):
+        return 'Record({!r})'.format(self.to_dict())
+    def __reduce__(self):
+        return Record, (self._keys, self._values)
+    def to_dict(self):
+        return dict(zip(self._keys, self._values))
+
+RECORD_MAX_KEYS = 32 # records look keys up with a scan, bigger dicts stay dicts
+
+def _shared(strings, value):
+    return strings.setdefault(value, value) if type(value) is str else value
+
+def compact_tree(tree, strings=None):
+    """ returns a copy of a parsed tree where every small dict holding only scalars (field rows,
+        links, meta blocks) is a Record and equal strings in it are one object. lookups work
+        as before since records are Mappings, expand_tree() turns the tree back into plain dicts.
+        strings is the memo of the tree's strings, sys.intern isn't used so the saving doesn't
+        depend on what else the process has interned and the strings go away with the tree """
+    strings = {} if strings is None else strings
+    if isinstance(tree, dict):
+        if 0 < len(tree) <= RECORD_MAX_KEYS and all(v is None or isinstance(v, (str, int, float)) for v in tree.values()):
+            return Record(tuple(_shared(strings, k) for k in tree), tuple(_shared(strings, v) for v in tree.values()))
+        return {_shared(strings, k): compact_tree(v, strings) for k, v in tree.items()}
+    if isinstance(tree, list):
+        return [compact_tree(v, strings) for v in tree]
+    return _shared(strings, tree)
+
+def expand_tree(tree):
+    """ inverse of compact_tree(), returns the tree itself when there aren't any records in it """
+    if isinstance(tree, Record):
+        return tree.to_dict()
+    if isinstance(tree, dict):
+        expanded = {k: expand_tree(v) for k, v in tree.items()}
+        return tree if all(expanded[k] is v for k, v in tree.items()) else expanded
+    if isinstance(tree, list):
+        expanded = [expand_tree(v) for v in tree]
+        return tree if all(e is v for e, v in zip(expanded, tree)) else expanded
+    return tree
+
+class ParseStats(object):
+    """ counters and per renderer duration histograms collected by parse_ossem / iter_ossem
+        when they are given a ParseStats. every parsed file adds a record with its duration,
+        bytes read, tables and rows rendered and the renderer class that was used """
+    buckets = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, float('inf')) # upper bounds in seconds
+
+    def __init__(self):
+        self.records = []
+        self.counters = collections.Counter()
+        self.histograms = {} # renderer name -> count per bucket
+        self.sample_errors = [] # coerce_samples errors, with the file or tree path they came from
+        self.started = None
+        self.elapsed = 0.0
+
+    def start(self):
+        self.started = time.perf_counter()
+    def stop(self):
+        if self.started is not None:
+            self.elapsed += time.perf_counter() - self.started
+            self.started = None
+
+    def add(self, record):
+        """ add the record profile_file returned for a parsed file """
+        self.records.append(record)
+        self.counters['files'] += 1
+        self.counters['bytes'] += record['bytes']
+        self.counters['tables'] += record['tables']
+        self.counters['rows'] += record['rows']
+        histogram = self.histograms.setdefault(record['renderer'], [0] * len(self.buckets))
+        histogram[bisect.bisect_left(self.buckets, record['seconds'])] += 1
+        self.add_sample_errors(record.get('sample_errors', ()), file=record['file'])
+    def add_sample_errors(self, errors, **where):
+        """ add sample values that didn't convert to their declared type """
+        self.sample_errors.extend(dict(e, **where) for e in errors)
+    def add_cached(self, filename):
+        """ count a file that came out of the parse cache """
+        self.counters['cache_hits'] += 1
+
+    def slowest(self, n=10):
+        return sorted(self.records, key=lambda r: r['seconds'], reverse=True)[:n]
+
+    def summary(self, top=10):
+        """ human readable summary of the counters, histograms and slowest files """
+        lines = ["parsed {files} files ({bytes} bytes, {tables} tables, {rows} rows), {cache_hits} from the cache".format(
+            **{k: self.counters[k] for k in ('files', 'bytes', 'tables', 'rows', 'cache_hits')})]
+        lines.append("wall time {:.3f}s, parse time {:.3f}s".format(self.elapsed, sum(r['seconds'] for r in self.records)))
+        lines.append("")
+        lines.append("{:<32}".format('renderer') + ''.join('{:>8}'.format('<{}'.format(b) if b != float('inf') else 'more') for b in self.buckets))
+        for renderer, histogram in sorted(self.histograms.items()):
+            lines.append("{:<32}".format(renderer) + ''.join('{:>8}'.format(c) for c in histogram))
+        lines.append("")
+        lines.append("slowest files:")
+        for r in self.slowest(top):
+            lines.append("  {:>8.1f}ms {:>9} bytes {:>3} tables {:>5} rows  {}  {}".format(
+                r['seconds'] * 1000, r['bytes'], r['tables'], r['rows'], r['renderer'], r['file']))
+        if self.sample_errors:
+            lines.append("")
+            lines.append("{} sample values didn't match their type:".format(len(self.sample_errors)))
+            for e in self.sample_errors[:top]:
+                lines.append("  {} {} ({}) {!r}: {}".format(e.get('file') or e.get('path'), e['field'], e['type'], e['value'], e['error']))
+        return '\n'.join(lines)
+
+def image_link(filename):
+    """ value for a file in resources/images, a link to it on github """
+    return {'link': 'https://github.com/Cyb3rWard0g/OSSEM/blob/master/resources/images/{}'.format(filename)}
+
+class RendererRegistry(object):
+    """ decides which parse method handles a file. rules are keyed on a glob for the directory
+        (matched against any run of the folders on its path, so a rule covers that directory and
+        everything below it, also when --ossem points inside it) and the file extension, '*' for any file. the rules for a directory are worked out once, after
+        that every file is a dict lookup on its extension. when several rules match, the one
+        registered last wins so plugins can take over a section.
+
+        other packages add sections through the 'ossem_parser.renderers' entry point group, every
+        entry point is a function that gets called with the registry the first time it is used """
+    entry_point_group = 'ossem_parser.renderers'
+
+    def __init__(self):
+        self.rules = [] # (directory glob, extension, parse method, value function)
+        self.entry_points_loaded = False
+        self.dirs = {} # directory -> {extension: (parse method, value function)}
+
+    def register(self, directory, method=None, extension='.md', value=None):
+        """ method is the name of an OSSEMParser parse method or 'module:Renderer' for a DictRenderer
+            subclass, value is a function of the file name for files that are stored without parsing """
+        self.rules.append((directory, extension.lower(), method, value))
+        self.dirs.clear()
+
+    def load_entry_points(self):
+        self.entry_points_loaded = True
+        from importlib.metadata import entry_points # only imported when there is something to dispatch
+        for entry_point in entry_points(group=self.entry_point_group):
+            entry_point.load()(self)
+
+    def dispatch(self, folders):
+        """ {extension: (parse method, value function)} for the files in a directory given as
+            the list of folders on its path """
+        directory = '/'.join(folders)
+        if directory not in self.dirs:
+            if not self.entry_points_loaded:
+                self.load_entry_points()
+            ancestors = ['/'.join(folders[i:j]) for i in range(len(folders)) for j in range(i + 1, len(folders) + 1)]
+            self.dirs[directory] = {extension: (method, value) for glob, extension, method, value in self.rules
+                                    if any(fnmatch.fnmatchcase(a, glob) for a in ancestors)}
+        return self.dirs[directory]
+
+RENDERERS = RendererRegistry()
+RENDERERS.register('data_dictionaries', 'parse_dd_md')
+RENDERERS.register('common_information_model', 'parse_cim_md')
+RENDERERS.register('attack_data_sources', 'parse_ads_md')
+RENDERERS.register('detection_data_model', 'parse_ddm_md')
+RENDERERS.register('resources/images', extension='*', value=image_link)
+
+def scandir_walk(top):
+    """ os.walk (top down, not following links) with a single os.scandir per directory,
+        dirs can be pruned in place like with os.walk """
+    dirs, files, links = [], [], set()
+    try:
+        entries = os.scandir(top)
+    except OSError:
+        return
+    with entries:
+        for entry in entries:
+            if entry.is_dir():
+                dirs.append(entry.name)
+                if entry.is_symlink():
+                    links.add(entry.name)
+            else:
+                files.append(entry.name)
+    yield top, dirs, files
+    for d in dirs:
+        if d not in links:
+            yield from scandir_walk(os.path.join(top, d))
+
+class OSSEMParser(object):
+    def read_file(self, filename):
+        ''' read contents of a file '''
+        from ossem_archive import ArchiveFile
+        if isinstance(filename, ArchiveFile):
+            return filename.markdown
+        try:
+            with open(filename) as file:
+                file_content = file.read()
+                return file_content
+        except FileNotFoundError as e:
+            print("File not found: {0}".format(filename))
+
+    def parse_cim_md(self, markdown):
+        """ parse markdown structured for OSSEM common information model """
+        from ossem_renderers import CIMDictRenderer
+        return self.parse_md_file(CIMDictRenderer, markdown)
+    def parse_dd_md(self, markdown):
+        """ parse markdown structured for OSSEM data dictionaries """
+        from ossem_renderers import DataDictionaryDictRenderer
+        return self.parse_md_file(DataDictionaryDictRenderer, markdown)
+
+    def parse_ads_md(self, markdown):
+        """ parse markdown structured for OSSEM attack data sources """
+        from ossem_renderers import AttackDataSourceDictRenderer
+        return self.parse_md_file(AttackDataSourceDictRenderer, markdown)
+
+    def parse_ddm_md(self, markdown):
+        """ parse markdown structured for OSSEM detection data model """
+        from ossem_renderers import DetectionDataModelDictRenderer
+        return self.parse_md_file(DetectionDataModelDictRenderer, markdown)
+
+    def parse_md_file(self, renderer, markdown):
+        """ parse markdown file according to our renderer type """
+        from ossem_renderers import Markdown
+        dict_renderer = renderer()
+        md = Markdown(escape=True, renderer=dict_renderer)
+        md.parse(markdown)
+        self.last_renderer = dict_renderer # lets profile_file see what was rendered
+        return md.renderer.get_python_dict()
+
+    def parse_many(self, renderer, markdowns):
+        """ generator that parses an iterable of markdown documents with one renderer type,
+            yielding the dict for each. a single renderer and Markdown engine are set up for
+            the whole batch and the renderer is reset between documents """
+        from ossem_renderers import Markdown
+        dict_renderer = renderer()
+        md = Markdown(escape=True, renderer=dict_renderer)
+        for markdown in markdowns:
+            dict_renderer.reset()
+            md.parse(markdown)
+            self.last_renderer = dict_renderer
+            yield dict_renderer.get_python_dict()
+
+    def source(self, ossem_dir, revision=None):
+        """ what parse_ossem walks: the directory itself, or an ArchiveSource for an archive,
+            a bare git repository or any git repository when a revision is given """
+        from ossem_archive import ArchiveSource
+        if isinstance(ossem_dir, ArchiveSource):
+            return ossem_dir
+        if revision is not None or os.path.isfile(ossem_dir) or ArchiveSource.is_git(ossem_dir):
+            return ArchiveSource(ossem_dir, revision)
+        return ossem_dir
+
+    def walk_ossem(self, ossem_dir, subsets=None, base=()):
+        """ walks an OSSEM checkout yielding (folders, subdir, jobs) for every directory.
+            subdir is the dictionary for that directory with a key for each file and
+            jobs are (key, parse method name, path) in the order they should be assigned.
+            the parse method name is None for entries that don't need parsing, in which
+            case path is the value itself. ossem_dir can also be an ArchiveSource.
+            subsets is a list of dotted paths like subset() takes, when given only the
+            directories and files on the way to or inside one of them are walked.
+            base are the folders above ossem_dir when it is a directory inside OSSEM """
+        from ossem_archive import ArchiveSource
+        subsets = [s.split('.') for s in subsets] if subsets else None
+        def wanted(keys):
+            # on the way to a subset or inside of one
+            return subsets is None or any(s[:len(keys)] == keys or keys[:len(s)] == s for s in subsets)
+        if isinstance(ossem_dir, ArchiveSource):
+            walk = ((path, path.split('/'), path.split('/'), dirs, files) for path, dirs, files in ossem_dir.walk())
+        else:
+            ossem_dir = ossem_dir.rstrip(os.sep)
+            start = ossem_dir.rfind(os.sep) + 1
+            # the renderer rules see the whole path, so a section or provider directory parses like it does in a checkout
+            above = os.path.abspath(ossem_dir).split(os.sep)[1:]
+            walk = ((path, list(base) + path[start:].split(os.sep), above + path[len(ossem_dir):].split(os.sep)[1:], dirs, files)
+                    for path, dirs, files in scandir_walk(ossem_dir))
+        for path, folders, location, dirs, files in walk:
+            dirs[:] = [d for d in dirs if not d.startswith('.') and wanted(folders[1:] + [d])]
+            subdir, jobs = self.dir_jobs(path, files, location)
+            jobs = [job for job in jobs if wanted(folders[1:] + [job[0]])]
+            if isinstance(ossem_dir, ArchiveSource):
+                jobs = [(k, m, ossem_dir.file(p) if m else p) for k, m, p in jobs]
+            yield folders, subdir, jobs
+
+    def dir_jobs(self, path, files, folders):
+        """ works out the (subdir, jobs) walk_ossem yields for a single directory,
+            folders is its path as a list, the renderer rules are matched against it """
+        rules = RENDERERS.dispatch(folders)
+        subdir = {}
+        jobs = []
+        for f in files:
+            if f.startswith('.'):
+                continue
+            k = f
+            if k.lower().endswith('.md'):
+                k = k[:-3]
+            if k.lower().startswith('event-'):
+                k = k[6:]
+            subdir[k] = None
+            if f.lower() == 'readme.md':
+                continue
+            method, value = rules.get(os.path.splitext(f)[1].lower()) or rules.get('*') or (None, None)
+            if method:
+                jobs.append((k, method, os.path.join(path, f)))
+            elif value:
+                jobs.append((k, None, value(f)))
+        return subdir, jobs
+
+    def parse_ossem(self, ossem_dir, workers=None, cache_dir=None, stats=None, events=False, compact=False, revision=None, subsets=None, typed=False):
+        """ main method for controlling parsing of OSSEM markdown
+            workers > 1 farms the per file parsing out to a process pool
+            cache_dir keeps parsed files on disk so unchanged files aren't parsed again
+            stats is an optional ParseStats that gets a record for every file
+            events adds the event_index() of the data dictionaries next to OSSEM as 'event_index'
+            compact returns the compact_tree() form of the tree, rows are Records instead of dicts
+            ossem_dir can be a directory, a .tar(.gz)/.zip or a git repository (see source()), in
+            which case revision picks the commit to read
+            subsets only walks and parses what subset() needs for those paths, the rest of
+            the tree is left out (files next to them are None)
+            typed returns the typed_tree() form of the tree, every sample value converted to its
+            declared type. the ones that don't convert are added to stats """
+        ossem_dir = self.source(ossem_dir, revision)
+        ossem = {} # data stucture to maintain representation of OSSEM
+        subdirs = {(): ossem} # folders -> dictionary, parents are walked before their children
+        def jobs():
+            for folders, subdir, dir_jobs in self.walk_ossem(ossem_dir, subsets):
+                folders = tuple(folders)
+                subdirs[folders[:-1]][folders[-1]] = subdirs[folders] = subdir
+                for key, method, p in dir_jobs:
+                    yield (subdir, key), method, p
+
+        # results come back in job order so assigning them in order keeps the serial semantics
+        # (including which file wins when several map to the same key)
+        for (subdir, key), result in self.parse_stream(jobs(), workers, ossem_dir, cache_dir, stats, bool(subsets)):
+            subdir[key] = result
+        if typed:
+            errors = []
+            ossem = typed_tree(ossem, errors)
+            if stats:
+                stats.add_sample_errors(errors)
+        if compact:
+            ossem = compact_tree(ossem)
+        if events:
+            ossem['event_index'] = event_index(ossem)
+        return ossem
+
+    def iter_ossem(self, ossem_dir, workers=None, cache_dir=None, stats=None, keys=False, revision=None, subsets=None, typed=False):
+        """ generator version of parse_ossem that yields (dotted path, parsed dict)
+            for every OSSEM document as soon as it has been parsed, the dotted path
+            is relative to the top of OSSEM like the ones subset() takes.
+            keys=True yields the list of keys instead, keys can have dots in them.
+            subsets limits it to the documents on the way to or inside those dotted paths
+            typed yields the typed_tree() of every document like parse_ossem does """
+        ossem_dir = self.source(ossem_dir, revision)
+        def jobs():
+            for folders, subdir, dir_jobs in self.walk_ossem(ossem_dir, subsets):
+                for key, method, p in dir_jobs:
+                    yield folders[1:] + [key] if keys else '.'.join(folders[1:] + [key]), method, p
+        documents = self.parse_stream(jobs(), workers, ossem_dir, cache_dir, stats, bool(subsets))
+        return self.typed_documents(documents, stats) if typed else documents
+
+    def typed_documents(self, documents, stats=None):
+        """ typed_tree() of every (path or keys, document) iter_ossem yields """
+        for path, data in documents:
+            errors = []
+            data = typed_tree(data, errors, tuple(path) if isinstance(path, list) else tuple(path.split('.')))
+            if stats:
+                stats.add_sample_errors(errors)
+            yield path, data
+
+    def parse_stream(self, jobs, workers=None, ossem_dir=None, cache_dir=None, stats=None, partial=False):
+        """ generator that parses (context, parse method name, path) jobs and yields
+            (context, result) in the same order. misses run in a process pool when
+            workers > 1 and are looked up in / stored to the parse cache when cache_dir is set.
+            when stats is a ParseStats every file is recorded in it. archives aren't cached,
+            their content is already in memory. partial jobs (a subset of the tree) keep the
+            cache entries of files they didn't get to """
+        from ossem_archive import ArchiveSource
+        from ossem_cache import ParseCache
+        cache = ParseCache(cache_dir, ossem_dir) if cache_dir and not isinstance(ossem_dir, ArchiveSource) else None
+        executor = None
+        if workers and workers > 1:
+            from concurrent.futures import ProcessPoolExecutor # only needed when running in parallel
+            # workers get the replacements explicitly in case they weren't forked from this process
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=add_unicode_replacements,
+                                           initargs=(dict(UNICODE_REPLACEMENTS),))
+        window = workers * 4 if executor else 0 # how many jobs we let run ahead of the consumer
+        pending = collections.deque()
+
+        def finish(job):
+            context, method, p, result, cached = job
+            if executor and not cached:
+                result = result.result()
+            if stats is not None and method:
+                if cached:
+                    stats.add_cached(p)
+                else:
+                    result, record = result
+                    stats.add(record)
+            if cache and not cached:
+                cache.put(method, p, result)
+            return context, result
+
+        if stats is not None:
+            stats.start()
+        try:
+            for context, method, p in jobs:
+                if not method:
+                    pending.append((context, method, p, p, True))
+                else:
+                    result = cache.get(method, p) if cache else None
+                    if result is not None:
+                        pending.append((context, method, p, result, True))
+                    elif executor:
+                        pending.append((context, method, p, executor.submit(_parse_job, (method, p, stats is not None)), False))
+                    elif stats is not None:
+                        pending.append((context, method, p, self.profile_file(method, p), False))
+                    else:
+                        pending.append((context, method, p, self.parse_file(method, p), False))
+                while len(pending) > window or (pending and (pending[0][4] or pending[0][3].done())):
+                    yield finish(pending.popleft())
+            while pending:
+                yield finish(pending.popleft())
+            if cache:
+                cache.save(prune=not partial)
+        finally:
+            if executor:
+                executor.shutdown(cancel_futures=True)
+            if stats is not None:
+                stats.stop()
+
+    def parse_method(self, method):
+        """ one of the parse_*_md methods given by name, or 'module:Renderer' for a DictRenderer
+            subclass registered by a plugin """
+        if ':' in method:
+            module, name = method.split(':', 1)
+            renderer = getattr(importlib.import_module(module), name)
+            return lambda markdown: self.parse_md_file(renderer, markdown)
+        return getattr(self, method)
+
+    def parse_file(self, method, filename):
+        """ read a file and parse it with one of the parse_*_md methods, given by name """
+        return self.parse_method(method)(self.read_file(filename))
+
+    def profile_file(self, method, filename):
+        """ parse_file that also returns a record of how the parse went for ParseStats """
+        start = time.perf_counter()
+        markdown = self.read_file(filename)
+        result = self.parse_method(method)(markdown)
+        renderer = self.last_renderer
+        return result, {
+          'file': filename,
+          'renderer': type(renderer).__name__,
+          'seconds': time.perf_counter() - start,
+          'bytes': len(markdown.encode('utf-8')),
+          'tables': renderer.tables_rendered,
+          'rows': renderer.rows_rendered - renderer.tables_rendered, # minus the header rows
+          'sample_errors': renderer.sample_errors
+        }
+
+def _parse_job(job):
+    """ process pool entry point, job is a (parse method name, path, collect stats) tuple """
+    method, filename, profile = job
+    if profile:
+        return OSSEMParser().profile_file(method, filename)
+    return OSSEMParser().parse_file(method, filename)
+
+YAML_WIDTH = 2 ** 30 # never fold long scalars, libyaml and the python emitter fold them differently
+
+def yaml_dumper(engine='auto'):
+    """ pick the yaml Dumper class for an engine: 'libyaml' (the C emitter), 'python'
+        (the pure python emitter) or 'auto' which uses libyaml when pyyaml was built with it """
+    import yaml # only loaded when yaml gets written
+    if engine == 'python':
+        return yaml.SafeDumper
+    if engine in ('auto', 'libyaml'):
+        dumper = getattr(yaml, 'CSafeDumper', None)
+        if dumper is not None:
+            return dumper
+        if engine == 'libyaml':
+            raise RuntimeError("pyyaml was built without libyaml support")
+        return yaml.SafeDumper
+    raise ValueError("unknown yaml engine {}".format(engine))
+
+@functools.lru_cache(maxsize=None)
+def unaliased(dumper):
+    """ a subclass of a Dumper that writes an object out in full every time it shows up instead of
+        as an &anchor and *aliases, the event_index shares its documents with the tree """
+    return type(dumper.__name__, (dumper,), {'ignore_aliases': lambda self, data: True})
+
+def dump_yaml(data, stream=None, engine='auto'):
+    """ dump data as block style yaml with sorted keys and unfolded scalars.
+        this canonical form is byte for byte the same whichever engine is used,
+        the only differences from a plain yaml.dump are long scalars stay on one line
+        and there are no anchors or aliases """
+    import yaml
+    return yaml.dump(data, stream, Dumper=unaliased(yaml_dumper(engine)), default_flow_style=False, width=YAML_WIDTH)
+
+OUTPUT_EXTENSIONS = {'.json': 'json', '.yaml': 'yaml', '.yml': 'yaml', '.xml': 'xml', '.py': 'python', '.snapshot': 'snapshot', '.npz': 'columnar'}
+
+def write_output(ossem, output_format, stream, yaml_engine='auto'):
+    """ write a parsed tree to a text stream in one of the CLI output formats """
+    ossem = expand_tree(ossem)
+    if output_format == 'json':
+        stream.write(json.dumps(ossem))
+    elif output_format == 'yaml':
+        dump_yaml(ossem, stream, engine=yaml_engine)
+    elif output_format == 'xml':
+        from ossem_xml import write_xml
+        write_xml(ossem, stream)
+    elif output_format == 'snapshot':
+        from ossem_snapshot import write_snapshot
+        stream.flush()
+        write_snapshot(ossem, stream.buffer)
+        stream.buffer.flush()
+        return
+    elif output_format == 'columnar':
+        # the data dictionary field rows of the whole tree, see ossem_columnar
+        from ossem_columnar import write_columnar, data_dictionary_rows, tree_documents
+        stream.flush()
+        write_columnar(data_dictionary_rows(tree_documents(ossem)), stream.buffer)
+        stream.buffer.flush()
+        return
+    elif output_format == 'python':
+        stream.write("ossem = {}".format(ossem))
+    stream.write('\n')
+
+def save_output(ossem, filename, output_format=None, yaml_engine='auto'):
+    """ write a parsed tree to a file, the format comes from the extension unless given.
+        the file is replaced atomically so readers never see half an output """
+    output_format = output_format or OUTPUT_EXTENSIONS.get(os.path.splitext(filename)[1].lower(), 'yaml')
+    tmp = '{}.{}.tmp'.format(filename, os.getpid())
+    with open(tmp, 'w') as fh:
+        write_output(ossem, output_format, fh, yaml_engine)
+    os.replace(tmp, filename)
+
+def subset(subset, ossem):
+    ossem = ossem['OSSEM']
+    keys = []
+    if '.' in subset:
+        keys = subset.split('.')
+    else:
+        keys = [subset]
+    for k in keys:
+        if k not in ossem:
+            print("Invalid subset doesn't exist in OSSEM data model")
+            sys.exit()
+        else:
+            ossem = ossem[k]
+    return ossem
+
+def subset_tree(subsets, ossem, lookup=subset):
+    """ like subset() but keeps the path to the subset, {'OSSEM': {'data_dictionaries': {...}}}.
+        subsets is a dotted path or a list of them which all end up in the same tree.
+        lookup(subset, ossem) is what finds a subset, e.g. in a Snapshot instead of a dict """
+    subsets = [subsets] if isinstance(subsets, str) else subsets
+    tree = {}
+    for s in subsets:
+        keys = s.split('.')
+        if any(keys[:len(o.split('.'))] == o.split('.') for o in subsets if o != s):
+            continue # already inside another subset
+        node = tree.setdefault('OSSEM', {})
+        for k in keys[:-1]:
+            node = node.setdefault(k, {})
+        node[keys[-1]] = lookup(s, ossem)
+    return tree
+
+def tree_lookup(keys, tree):
+    """ the value at a list of keys in a parsed tree, raises KeyError when it isn't there """
+    for k in keys:
+        if not isinstance(tree, dict) or k not in tree:
+            raise KeyError('.'.join(keys))
+        tree = tree[k]
+    return tree
+
+def tree_root(keys):
+    """ where subset lookups start in a tree written by parse, given its top level keys. a
+        single --subset is written without the OSSEM root above it, so it is its own root """
+    return ['OSSEM'] if 'OSSEM' in keys else []
@@ -0,0 +1,368 @@
+""" the mistune renderers that turn each kind of OSSEM markdown into a python dict
+
+    kept apart from ossem_parser so mistune is only imported when markdown actually
+    gets parsed, ossem_parser re-exports them """
+
+import mistune
+from mistune import Markdown
+
+import ossem_parser # looked up on every use, so setting ossem_parser.VERBOSE or patching a helper takes effect
+
+class DictRenderer(mistune.Renderer):
+    """ base class that renders a python dictionary
+        from markdown using mistune """
+    def __init__(self, renderer=None, inline=None, block=None, **kwargs):
+        super().__init__(**kwargs)
+        self.object_data = {}
+        self.fields_key = None
+        self.table_headers_done = None
+        self.table_headers = []
+        self.current_table_entry = {}
+        self.current_table_entry_index = 0
+        self.table_count = 0
+        self.tables_rendered = 0 # these two are only bookkeeping for ParseStats
+        self.rows_rendered = 0 # includes the header row of every table
+        self.sample_errors = [] # sample values that didn't match their type
+    def get_python_dict(self):
+        """ this method can be called to extract the dictionary at the end of the parsing phase """
+        return self.object_data
+    def reset(self):
+        """ forget everything about the last document so the renderer (and the Markdown
+            engine holding it) can be reused for the next one, like a freshly created renderer """
+        options = self.options
+        self.__dict__.clear()
+        self.__init__(**options)
+    def block_code(self, code, lang=None):
+        """ handler that gets called when the parser hits markdown block code """
+        if ossem_parser.VERBOSE:
+            print("block_code: {} lang: {}".format(code, lang))
+        return code
+    def block_quote(self, text):
+        """ handler that gets called when the parser hits markdown block quote """
+        if ossem_parser.VERBOSE:
+            print("block_quote: {}".format(text))
+        return text
+    def block_html(self, html):
+        """ handler that gets called when the parser hits markdown block html """
+        raise NotImplementedError("block_html has not been implemented")
+    def hrule(self):
+        """ handler that gets called when the parser hits hrule element in markdown """
+        if ossem_parser.VERBOSE:
+            print("hrule")
+        return ''
+    def list(self, body, ordered=True):
+        """ handler that gets called when it hits a markdown list """
+        if ossem_parser.VERBOSE:
+            print("body: {} ordered: {}".format(body, ordered))
+        return body
+    def list_item(self, text):
+        """ handler that gets called when mistune hits an item in a markdown list """
+        if ossem_parser.VERBOSE:
+            print("list_item: {}".format(text))
+        return text
+    def paragraph(self, text):
+        """ handler that gets called when mistune hits a paragraph in markdown """
+        if ossem_parser.VERBOSE:
+            print("paragraph: {}".format(text))
+        return text
+    def table(self, header, body):
+        """ handler that gets called when mistune hits a table in markdown.
+            Note this actually gets called when the table is finished being processed """
+        if ossem_parser.VERBOSE:
+            print("table header: {} table body: {}".format(header, body))
+        self.tables_rendered += 1
+        if self.table_count == 0 and isinstance(self.object_data.get(self.fields_key), dict):
+            # integer sample values of the whole table are converted in one go, see coerce_samples
+            self.sample_errors.extend(ossem_parser.coerce_samples(self.object_data[self.fields_key], ossem_parser.INTEGER_SAMPLES))
+        self.table_headers_done = False
+        self.table_headers = []
+        self.current_table_index = 0
+        if self.table_count == 0:
+          self.current_table_entry = {}
+        else:
+          self.current_table_entry = []
+        self.table_count += 1
+        return body
+    def double_emphasis(self, text):
+        """ handler that gets called when mistune his double_emphasis in markdown """
+        if ossem_parser.VERBOSE:
+            print("double_emphasis: {}".format(text))
+        return text
+    def emphasis(self, text):
+        """ handler that gets called when mistune hits emphasis markdown element """
+        raise NotImplementedError("emphasis has not been implemented")
+    def codespan(self, text):
+        """ handler called when mistune hits codespan """
+        raise NotImplementedError("codespan has not been implemented")
+    def linebreak(self):
+        """ handler called when mistune hits linebreak markdown """
+        raise NotImplementedError("linebreak has not been implemented")
+    def strikethrough(self, text):
+        """ handler called when mistune hits strikethrough element """
+        raise NotImplementedError("strikethrough has not been implemented")
+    def escape(self, text):
+        """ handler called when mistune hits escape element """
+        if ossem_parser.VERBOSE:
+            print("escape: {}".format(text))
+        return text
+    def autolink(self, link, is_email=False):
+        """ handler called when mistune hits autolink markdown """
+        if ossem_parser.VERBOSE:
+            print("auto_link: {} is_email: {}".format(link, is_email))
+        return link
+    def link(self, link, title, text):
+        """ handler called when mistune hits link markdown element """
+        if ossem_parser.VERBOSE:
+            print("link: {} title: {} text: {}".format(link, title, text))
+        return link
+    def image(self, src, title, text):
+        """ handler called when mistune hits image markdown element """
+        if ossem_parser.VERBOSE:
+            print("image src: {} title: {} text: {}".format(src, title, text))
+        return src
+    def inline_html(self, html):
+        """ handler called when mistune hits inline_html markdown """
+        if ossem_parser.VERBOSE:
+            print("inline_html: {}".format(html))
+        return html
+    def newline(self):
+        """ handler called when mistune hits a newline """
+        raise NotImplementedError("newline has not been implemented")
+    def footnote_ref(self, key, index):
+        """ handler called when mistune hits a footnote_ref markdown element """
+        raise NotImplementedError("footnote_ref has not been implemented")
+    def footnote_item(self, key, text):
+        """ handler called when mistune hits footnote_item markdown element """
+        raise NotImplementedError("footnote_item has not been implemented")
+    def footnotes(self, text):
+        """ handler called when mistune hits footnotes markdown element """
+        raise NotImplementedError("footnotes has not been implemented")
+    def header(self, text, level, raw=None):
+        """ handler called when mistune hits header element in markdown """
+        raise NotImplementedError("header has not been implemented")
+    def header(self, text, level, raw=None):
+        """ handler called when header element parsed by mistune """
+        raise NotImplementedError("header has not been implemented")
+    def text(self, text):
+        """ handler called when text is reached during mistune parsing run """
+        raise NotImplementedError("text has not been implemented")
+    def table_row(self, content):
+        """ handler called when table_row is parsed by mistune """
+        if ossem_parser.VERBOSE:
+            print("table_row: {}".format(content))
+        self.rows_rendered += 1
+        self.table_headers_done = True #table_row gets called by mistune at the end of the row
+        self.entry_length = len(self.table_headers)
+        self.first_table_column_name = self.table_headers[0]
+        return content
+    def table_cell(self, content, **flags):
+        """ handler that gets called when mistune hits a table cell in markdown """
+        if ossem_parser.VERBOSE:
+            print("table_cell: {}".format(content))
+        if not self.table_headers_done:
+            self.table_headers.append(ossem_parser.lower_under_joined(content))
+        else:
+            content = ossem_parser.convert_unicode_quotes_dashes(content)
+            if self.table_count > 0 and ('http' in content or '..' in content):
+              self.current_table_entry[self.table_headers[self.current_table_entry_index]] = self.current_link
+            else:
+              self.current_table_entry[self.table_headers[self.current_table_entry_index]] = content
+            if ossem_parser.VERBOSE:
+                print("current_table_entry: {} current_table_entry_index: {}".format(self.current_table_entry, self.current_table_entry_index))
+            self.current_table_entry_index += 1
+            if self.current_table_entry_index >= self.entry_length:
+                if self.table_count == 0:
+                    first_table_column_value = self.current_table_entry[self.table_headers[0]]
+                    del self.current_table_entry[self.first_table_column_name]
+                    self.object_data[self.fields_key][first_table_column_value] = self.current_table_entry
+                else:
+                    self.object_data[self.fields_key].append(self.current_table_entry)
+                self.current_table_entry = {}
+                self.current_table_entry_index = 0
+        return content
+
+class CIMDictRenderer(DictRenderer):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.description_next = False
+        self.current_link = None
+    def header(self, text, level, raw=None):
+        if ossem_parser.VERBOSE:
+            print("header: {} level: {}".format(text, level))
+        if level == 1 and 'name' not in self.object_data:
+            self.object_data['name'] = text
+            self.description_next = True
+        if level == 2 and text not in self.object_data:
+            text = ossem_parser.lower_under_joined(text)
+            self.fields_key = ossem_parser.lower_under_joined(text)
+            if self.table_count == 0:
+                self.object_data[self.fields_key] = {}
+            else:
+                self.object_data[self.fields_key] = []
+        return text
+    def text(self, text):
+        if self.description_next == True:
+            self.object_data['description'] = text
+            self.description_next = False
+        if ossem_parser.VERBOSE:
+            print("text: {}".format(text))
+        return text
+    def link(self, link, title, text):
+        if ossem_parser.VERBOSE:
+            print("link: {} title: {} text: {}".format(link, title, text))
+        self.current_link = {'link': link, 'text': text}
+
+class DataDictionaryDictRenderer(DictRenderer):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.meta_complete = False
+        self.got_meta_date = False
+        self.seen_title = False
+        self.description_next = False
+        self.description_done = False
+        self.evi_next = False
+    def text(self, text):
+        if ossem_parser.VERBOSE:
+            print("text: '{}'".format(text))
+        if not self.meta_complete:
+            if ":" in text:
+                meta = {}
+                for e in text.split('\n'):
+                    k,v = e.split(':')
+                    k = k.replace('.', '_') # dots sometimes have special implications like in Elastic Search so we use _ instead
+                    meta[k] = v.rstrip().strip()
+                self.meta_complete = True
+                self.object_data['meta'] = meta
+                return text
+            else:
+                # we don't appear to have metadata
+                self.meta_complete = True
+        if not self.got_meta_date and text.startswith('date:'):
+            k,v = text.split(":")
+            v = v.rstrip().strip()
+            self.object_data['meta']['date'] = v
+            self.got_meta_date = True
+            return text
+
+        if self.description_next:
+            description = text
+            self.object_data['description'] = {'text': ossem_parser.convert_unicode_quotes_dashes(description)}
+
+            self.description_next = False
+            return text
+
+        if self.evi_next:
+            evi = text
+            self.evi_next = False
+            return text
+
+        return text
+    def header(self, text, level, raw=None):
+        if ossem_parser.VERBOSE:
+            print("header: {} level: {}".format(text, level))
+        if level == 1 and not self.seen_title:
+            self.object_data['title'] = text
+            self.seen_title = True
+            return text
+        if level == 2 and text.startswith('Desc'):
+            self.description_next = True
+            return text
+        if level == 2 and text.startswith("Event"):
+            self.evi_next = True
+            self.description_done = True
+        if level == 2 and text.startswith("Data"): # not in self.object_data::
+            text = ossem_parser.lower_under_joined(text)
+            self.fields_key = ossem_parser.lower_under_joined(text)
+            self.object_data[self.fields_key] = {}
+        return text
+    def link(self, link, title, text):
+        if ossem_parser.VERBOSE:
+            print("link: {} title: {} text: {}".format(link, title, text))
+        if not self.description_done:
+            if 'links' not in self.object_data['description']:
+                self.object_data['description']['links'] = []
+            self.object_data['description']['links'].append({'link': link, 'text': text})
+    def inline_html(self, html):
+        if self.evi_next:
+            img = ossem_parser.html_attrs(html, 'img')
+            if img is None:
+                return html
+            self.object_data['event_log_illustration'] = {
+              'image': {
+                'link': img['src'],
+                'alt': img['alt'],
+                'width': int(img['width']),
+                'height': int(img['height'])
+              }
+            }
+            self.evi_next = False
+            return html
+    def block_code(self, code, lang=None):
+        if self.evi_next:
+            language = ossem_parser.detect_language(code)
+            self.object_data['event_data' ] = { 'type': language, 'data': code }
+        return code
+
+class AttackDataSourceDictRenderer(DictRenderer):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.name_complete = False
+        self.description_complete = False
+    def text(self, text):
+        if ossem_parser.VERBOSE:
+            print("text: '{}'".format(text))
+        if self.name_complete and not self.description_complete:
+            #self.object_data['description'] = { 'text': text }
+            self.object_data['description'] = text
+            self.description_complete = True
+        return text
+    def header(self, text, level, raw=None):
+        if ossem_parser.VERBOSE:
+            print("header: {} level: {}".format(text, level))
+        if level == 1:
+            self.object_data['name'] = text
+            self.name_complete = True
+        if level == 2 and text not in self.object_data:
+            text = ossem_parser.lower_under_joined(text)
+            self.fields_key = ossem_parser.lower_under_joined(text)
+            self.object_data[self.fields_key] = {}
+        return text
+
+class DetectionDataModelDictRenderer(DictRenderer):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.table_headers = []
+        self.table_headers_complete = False
+        self.table_rows = []
+        self.current_table_row = {}
+        self.column_index = 0
+        self.object_data['rows'] = []
+    def text(self, text):
+        if ossem_parser.VERBOSE:
+            print("text: {}".format(text))
+        return text
+    def header(self, text, level, raw=None):
+        if ossem_parser.VERBOSE:
+            print("haeder: {} level: {}".format(text, level))
+        if level == 1:
+            self.object_data['name'] = text
+        return text
+    def table_cell(self, content, **flags):
+        if ossem_parser.VERBOSE:
+            print("table_cell: {}".format(content))
+        if not self.table_headers_complete:
+            self.table_headers.append(content)
+        else:
+            self.current_table_row[self.table_headers[self.column_index]] = content
+            self.column_index += 1
+        return content
+    def table_row(self, content):
+        if ossem_parser.VERBOSE:
+            print("table_row: {}".format(content))
+        self.rows_rendered += 1
+        self.table_headers_complete = True
+        if len(self.current_table_row) > 0:
+            self.object_data['rows'].append(self.current_table_row)
+        self.current_table_row = {}
+        self.column_index = 0
+        return content
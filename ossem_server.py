@@ -0,0 +1,183 @@
+""" local HTTP query service over a parsed OSSEM tree
+
+    python3 ossem_parser.py serve --ossem ../OSSEM [--host 127.0.0.1] [--port 8080]
+    python3 ossem_parser.py serve --snapshot ossem.snapshot
+    python3 ossem_parser.py serve --json data/ossem.json
+
+    endpoints (all return json):
+      /ossem/<dotted path>      same lookups as subset(), /ossem returns all of OSSEM
+      /fields/<name>            FieldIndex.find(), field names, standard names and CIM fields
+      /events/<event id>        the data dictionary of every platform.provider with that event id, ?provider=sysmon narrows it down
+
+    the tree is parsed or loaded once and the body of every /ossem subtree is serialized
+    up front. field and event lookups are serialized the first time and kept in an LRU,
+    and every response has an ETag so clients can send If-None-Match and get a 304 back """
+
+import argparse, asyncio, collections, hashlib, json, sys
+from urllib.parse import urlsplit, unquote, parse_qs
+
+from ossem_core import FieldIndex, event_index, tree_lookup, tree_root
+from ossem_cli import load_tree
+
+STATUS = {200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed'}
+
+class OSSEMService(object):
+    """ answers requests against a parsed OSSEM tree. respond() is independent of the
+        transport so it can be used (and tested) without running the server """
+    def __init__(self, ossem, max_bodies=1024):
+        self.ossem = ossem
+        tree = ossem if isinstance(ossem, dict) else {}
+        # a snapshot or json of a single --subset has no OSSEM root, /ossem is its own root then
+        self.root = tree_lookup(tree_root(tree), ossem)
+        self.fields = FieldIndex(tree)
+        self.events = tree.get('event_index') or event_index(tree)
+        self.subtrees = {} # ('ossem', dotted path) -> (body, etag) for every dict in the tree
+        self.precompute(self.root, [])
+        self.bodies = collections.OrderedDict() # other request keys -> (body, etag), least recently used first
+        self.max_bodies = max_bodies
+
+    def precompute(self, node, path, reachable=True):
+        """ serialize every dict below node into self.subtrees. children go first and a parent's
+            body is put together from theirs, so nothing is serialized twice. returns node's json """
+        if not isinstance(node, dict):
+            return json.dumps(node)
+        body = '{' + ', '.join('{}: {}'.format(json.dumps(k), self.precompute(v, path + [k], reachable and '.' not in k))
+                               for k, v in node.items()) + '}'
+        if reachable: # keys with a dot in them can't be asked for with a dotted path
+            self.subtrees[('ossem', '.'.join(path))] = self.etagged(body.encode('utf-8'))
+        return body
+
+    def etagged(self, body):
+        return body, '"{}"'.format(hashlib.sha1(body).hexdigest())
+
+    def lookup(self, path):
+        """ subset() semantics without the sys.exit, raises KeyError for a missing path """
+        node = self.root
+        for k in path.split('.') if path else []:
+            if not isinstance(node, dict) or k not in node:
+                raise KeyError(path)
+            node = node[k]
+        return node
+
+    def body(self, key, build):
+        """ serialized body and etag for a request key, build() is only called when it isn't
+            a precomputed subtree or one of the max_bodies most recently used bodies """
+        if key in self.subtrees:
+            return self.subtrees[key]
+        if key in self.bodies:
+            self.bodies.move_to_end(key)
+        else:
+            self.bodies[key] = self.etagged(json.dumps(build()).encode('utf-8'))
+            if len(self.bodies) > self.max_bodies:
+                self.bodies.popitem(last=False)
+        return self.bodies[key]
+
+    def route(self, path, query):
+        """ (cache key, builder) for a request path, raises KeyError when there is nothing there """
+        parts = path.strip('/').split('/', 1)
+        name = unquote(parts[1]) if len(parts) > 1 else ''
+        if parts[0] == 'ossem':
+            self.lookup(name)
+            return ('ossem', name), lambda: self.lookup(name)
+        if parts[0] == 'fields' and name:
+            found = self.fields.find(name)
+            if not any(found.values()):
+                raise KeyError(name)
+            return ('fields', name), lambda: found
+        if parts[0] == 'events' and name:
+            provider = query.get('provider', [None])[0]
+            matches = {'{}.{}'.format(platform, p): events['events'][name]
+                       for platform, providers in self.events.items() for p, events in providers.items()
+                       if name in events['events'] and provider in (None, p)}
+            if not matches:
+                raise KeyError(name)
+            return ('events', name, provider), lambda: matches
+        raise KeyError(path)
+
+    def respond(self, method, target, headers):
+        """ returns (status, headers, body) for a request, headers are lower cased """
+        if method not in ('GET', 'HEAD'):
+            return 405, [('Allow', 'GET, HEAD')], b''
+        url = urlsplit(target)
+        try:
+            key, build = self.route(url.path, parse_qs(url.query))
+        except KeyError:
+            body = json.dumps({'error': 'not found', 'path': url.path}).encode('utf-8')
+            return 404, [('Content-Type', 'application/json')], body
+        body, etag = self.body(key, build)
+        response_headers = [('Content-Type', 'application/json'), ('ETag', etag), ('Cache-Control', 'no-cache')]
+        if etag in [t.strip() for t in headers.get('if-none-match', '').split(',')]:
+            return 304, response_headers, b''
+        return 200, response_headers, body
+
+async def handle_connection(service, reader, writer):
+    """ minimal HTTP/1.1 handler with keep-alive, requests are GET/HEAD without a body """
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            try:
+                method, target, version = line.decode('latin-1').split()
+            except ValueError:
+                method, target, version = None, None, 'HTTP/1.0'
+            headers = {}
+            while True:
+                header = await reader.readline()
+                if header in (b'\r\n', b'\n', b''):
+                    break
+                k, _, v = header.decode('latin-1').partition(':')
+                headers[k.strip().lower()] = v.strip()
+            if method is None:
+                status, response_headers, body = 400, [], b''
+            else:
+                status, response_headers, body = service.respond(method, target, headers)
+            keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+            head = ['HTTP/1.1 {} {}'.format(status, STATUS[status])]
+            head += ['{}: {}'.format(k, v) for k, v in response_headers]
+            head.append('Content-Length: {}'.format(len(body)))
+            head.append('Connection: {}'.format('keep-alive' if keep_alive else 'close'))
+            writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1'))
+            if method != 'HEAD':
+                writer.write(body)
+            await writer.drain()
+            if not keep_alive:
+                break
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+async def start_server(service, host='127.0.0.1', port=8080):
+    return await asyncio.start_server(lambda r, w: handle_connection(service, r, w), host, port)
+
+def load_ossem(args):
+    """ the tree to serve from --ossem, --snapshot or --json """
+    if args.ossem is None:
+        return load_tree(args)
+    from ossem_core import OSSEMParser
+    return OSSEMParser().parse_ossem(args.ossem)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='ossem_parser.py serve', description='serve OSSEM lookups over HTTP')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--ossem', type=str, help='base directory containing the OSSEM project')
+    source.add_argument('--snapshot', type=str, help='snapshot written with --output snapshot')
+    source.add_argument('--json', type=str, help='json written with --output json, like data/ossem.json')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='address to listen on (default 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8080, help='port to listen on (default 8080)')
+    args = parser.parse_args(argv)
+
+    service = OSSEMService(load_ossem(args))
+    async def run():
+        server = await start_server(service, args.host, args.port)
+        print("serving OSSEM on http://{}:{}".format(args.host, args.port), file=sys.stderr)
+        async with server:
+            await server.serve_forever()
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
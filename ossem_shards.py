@@ -0,0 +1,78 @@
+""" writing every OSSEM document to its own file for parse --output-dir """
+
+import os, io, json
+
+from ossem_core import write_output
+
+SHARD_EXTENSIONS = {'json': '.json', 'yaml': '.yaml', 'xml': '.xml', 'python': '.py'}
+MANIFEST = 'manifest.json'
+
+def _write_shard(job):
+    """ serialize one document and write it unless the manifest says it hasn't changed,
+        returns the manifest entry and whether the file was written """
+    import hashlib
+    output_dir, relpath, path, data, output_format, yaml_engine, old = job
+    stream = io.StringIO()
+    write_output(data, output_format, stream, yaml_engine)
+    content = stream.getvalue().encode('utf-8')
+    entry = {'path': path, 'sha256': hashlib.sha256(content).hexdigest(), 'size': len(content)}
+    filename = os.path.join(output_dir, relpath)
+    if old == entry and os.path.isfile(filename) and os.path.getsize(filename) == entry['size']:
+        return relpath, entry, False
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    tmp = '{}.{}.tmp'.format(filename, os.getpid())
+    with open(tmp, 'wb') as fh:
+        fh.write(content)
+    os.replace(tmp, filename)
+    return relpath, entry, True
+
+def write_shards(documents, output_dir, output_format='json', workers=None, yaml_engine='auto', subsets=None):
+    """ write every (list of keys, parsed document) to its own file below output_dir, mirroring
+        the OSSEM layout, plus a manifest.json of their sha256 hashes. files are only rewritten
+        when their content changed and files from the last run that are gone get removed.
+        with subsets (dotted paths) the documents only cover those, so only the files inside
+        them can be gone and the rest of the directory is left as it is.
+        returns (written, unchanged, removed) counts """
+    manifest_file = os.path.join(output_dir, MANIFEST)
+    try:
+        with open(manifest_file) as fh:
+            manifest = json.load(fh)
+        old = manifest['files']
+        same_format = manifest.get('format') == output_format
+    except (OSError, ValueError, KeyError):
+        old, same_format = {}, False
+    inside = lambda path: not subsets or any(path == s or path.startswith(s + '.') for s in subsets)
+    kept = {relpath: entry for relpath, entry in old.items() if not inside(entry['path'])}
+    if kept and not same_format:
+        raise ValueError("{} has {} files outside of the subsets, they can only be rewritten in another format "
+                         "without a subset".format(output_dir, manifest.get('format')))
+    def jobs():
+        for keys, data in documents:
+            if data is None: # README.md and friends have nothing in them
+                continue
+            relpath = os.path.join(*keys) + SHARD_EXTENSIONS[output_format]
+            yield output_dir, relpath, '.'.join(keys), data, output_format, yaml_engine, old.get(relpath) if same_format else None
+    if workers and workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_write_shard, jobs(), chunksize=16))
+    else:
+        results = [_write_shard(job) for job in jobs()]
+    files = dict(kept, **{relpath: entry for relpath, entry, _ in results})
+    removed = 0
+    for relpath in old:
+        filename = os.path.join(output_dir, relpath)
+        if relpath not in files and os.path.isfile(filename):
+            os.remove(filename)
+            removed += 1
+            parent = os.path.dirname(filename)
+            while os.path.normpath(parent) != os.path.normpath(output_dir) and not os.listdir(parent):
+                os.rmdir(parent) # don't leave empty directories behind for the sync to copy
+                parent = os.path.dirname(parent)
+    os.makedirs(output_dir, exist_ok=True)
+    tmp = '{}.{}.tmp'.format(manifest_file, os.getpid())
+    with open(tmp, 'w') as fh:
+        json.dump({'format': output_format, 'files': files}, fh, indent=2, sort_keys=True)
+    os.replace(tmp, manifest_file)
+    written = sum(1 for _, _, w in results if w)
+    return written, len(results) - written, removed
@@ -0,0 +1,174 @@
+""" memory mapped binary snapshots of a parsed OSSEM tree
+
+    a snapshot is a flat file of node tables and interned strings that can be
+    mmap'ed read only and shared between processes, lookups only decode the
+    nodes along the path and the subtree that gets returned.
+
+    layout (all integers little endian u32):
+      header   magic 'OSSEMSNP', version, root tag, root payload, string table offset, string count, reserved
+      nodes    dict: count, count * (key string id, tag, payload), count * entry index sorted by key
+               list: count, count * (tag, payload)
+      strings  count * (offset, length) into the utf-8 string data that follows
+
+    values are (tag, payload) pairs, payload is a string id for str/int/float and a
+    node offset for dict/list. Only depends on the standard library. """
+
+import mmap, struct
+
+MAGIC = b'OSSEMSNP'
+VERSION = 1
+HEADER = struct.Struct('<8sIIIIII')
+U32 = struct.Struct('<I')
+PAIR = struct.Struct('<II')
+TRIPLE = struct.Struct('<III')
+
+TAG_NONE, TAG_FALSE, TAG_TRUE, TAG_INT, TAG_FLOAT, TAG_STR, TAG_DICT, TAG_LIST = range(8)
+
+def write_snapshot(tree, fh):
+    """ serialize a parsed OSSEM tree (or any json like python object) to a binary file object """
+    strings = {}
+    nodes = bytearray(b'\0' * HEADER.size)
+
+    def intern(s):
+        if s not in strings:
+            strings[s] = len(strings)
+        return strings[s]
+
+    def value(v):
+        if v is None:
+            return TAG_NONE, 0
+        if v is True:
+            return TAG_TRUE, 0
+        if v is False:
+            return TAG_FALSE, 0
+        if isinstance(v, int):
+            return TAG_INT, intern(str(v))
+        if isinstance(v, float):
+            return TAG_FLOAT, intern(repr(v))
+        if isinstance(v, str):
+            return TAG_STR, intern(v)
+        if isinstance(v, dict):
+            keys = [k.encode('utf-8') for k in v]
+            entries = [(intern(k), value(c)) for k, c in v.items()]
+            offset = len(nodes)
+            nodes.extend(U32.pack(len(entries)))
+            for key_id, (tag, payload) in entries:
+                nodes.extend(TRIPLE.pack(key_id, tag, payload))
+            for i in sorted(range(len(entries)), key=keys.__getitem__):
+                nodes.extend(U32.pack(i))
+            return TAG_DICT, offset
+        if isinstance(v, (list, tuple)):
+            entries = [value(c) for c in v]
+            offset = len(nodes)
+            nodes.extend(U32.pack(len(entries)))
+            for tag, payload in entries:
+                nodes.extend(PAIR.pack(tag, payload))
+            return TAG_LIST, offset
+        raise TypeError("can't write {} to a snapshot".format(type(v).__name__))
+
+    root_tag, root_payload = value(tree)
+    encoded = [s.encode('utf-8') for s in strings]
+    strings_offset = len(nodes)
+    HEADER.pack_into(nodes, 0, MAGIC, VERSION, root_tag, root_payload, strings_offset, len(encoded), 0)
+    fh.write(nodes)
+    offset = 0
+    for s in encoded:
+        fh.write(PAIR.pack(offset, len(s)))
+        offset += len(s)
+    for s in encoded:
+        fh.write(s)
+
+class Snapshot(object):
+    """ read only view of a snapshot file, the file is mmap'ed so the pages are
+        shared between every process that opens the same snapshot """
+    def __init__(self, filename):
+        with open(filename, 'rb') as fh:
+            self.mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.root_tag, self.root_payload, self.strings_offset, self.string_count, _ = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("{} is not an OSSEM snapshot".format(filename))
+        self.string_data = self.strings_offset + PAIR.size * self.string_count
+
+    def close(self):
+        self.mm.close()
+    def __enter__(self):
+        return self
+    def __exit__(self, *exc):
+        self.close()
+
+    def _string_bytes(self, string_id):
+        offset, length = PAIR.unpack_from(self.mm, self.strings_offset + PAIR.size * string_id)
+        start = self.string_data + offset
+        return self.mm[start:start + length]
+
+    def _string(self, string_id):
+        return self._string_bytes(string_id).decode('utf-8')
+
+    def _child(self, offset, key):
+        """ binary search a dict node for key, returns the (tag, payload) of its value or None """
+        count, = U32.unpack_from(self.mm, offset)
+        entries = offset + U32.size
+        order = entries + TRIPLE.size * count
+        key = key.encode('utf-8')
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            i, = U32.unpack_from(self.mm, order + U32.size * mid)
+            key_id, tag, payload = TRIPLE.unpack_from(self.mm, entries + TRIPLE.size * i)
+            k = self._string_bytes(key_id)
+            if k == key:
+                return tag, payload
+            if k < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+    def _decode(self, tag, payload):
+        if tag == TAG_NONE:
+            return None
+        if tag == TAG_TRUE:
+            return True
+        if tag == TAG_FALSE:
+            return False
+        if tag == TAG_INT:
+            return int(self._string(payload))
+        if tag == TAG_FLOAT:
+            return float(self._string(payload))
+        if tag == TAG_STR:
+            return self._string(payload)
+        count, = U32.unpack_from(self.mm, payload)
+        if tag == TAG_DICT:
+            entries = (TRIPLE.unpack_from(self.mm, payload + U32.size + TRIPLE.size * i) for i in range(count))
+            return {self._string(key_id): self._decode(t, p) for key_id, t, p in entries}
+        entries = (PAIR.unpack_from(self.mm, payload + U32.size + PAIR.size * i) for i in range(count))
+        return [self._decode(t, p) for t, p in entries]
+
+    def _resolve(self, keys):
+        tag, payload = self.root_tag, self.root_payload
+        for k in keys:
+            child = self._child(payload, k) if tag == TAG_DICT else None
+            if child is None:
+                raise KeyError('.'.join(keys))
+            tag, payload = child
+        return tag, payload
+
+    def get(self, keys=()):
+        """ decode the value at keys (a list of keys or a dotted path) from the root of the snapshot """
+        if isinstance(keys, str):
+            keys = keys.split('.') if keys else []
+        return self._decode(*self._resolve(keys))
+
+    def keys(self, keys=()):
+        """ the keys of the dict at keys without decoding its values """
+        if isinstance(keys, str):
+            keys = keys.split('.') if keys else []
+        tag, payload = self._resolve(keys)
+        if tag != TAG_DICT:
+            return []
+        count, = U32.unpack_from(self.mm, payload)
+        return [self._string(TRIPLE.unpack_from(self.mm, payload + U32.size + TRIPLE.size * i)[0]) for i in range(count)]
+
+    def subset(self, subset):
+        """ same semantics as ossem_parser.subset, a dotted path below the OSSEM key """
+        return self.get(['OSSEM'] + subset.split('.'))
@@ -0,0 +1,158 @@
+""" keeping a parsed OSSEM tree up to date with a checkout for parse --watch """
+
+import os, sys, time
+from functools import reduce
+
+from ossem_core import OSSEMParser
+
+class Inotify(object):
+    """ minimal ctypes binding to linux inotify, OSSEMWatcher only uses it to
+        wake up as soon as something changes instead of sleeping a full poll interval """
+    MASK = 0x2 | 0x4 | 0x8 | 0x40 | 0x80 | 0x100 | 0x200 | 0x400 # modify, attrib, close_write, moved_from/to, create, delete, delete_self
+
+    def __init__(self):
+        import ctypes, ctypes.util
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watched = set()
+
+    @classmethod
+    def available(cls):
+        if not sys.platform.startswith('linux'):
+            return False
+        try:
+            cls().close()
+            return True
+        except (OSError, AttributeError):
+            return False
+
+    def watch(self, dirs):
+        """ add a watch for every directory we aren't watching yet """
+        for d in dirs:
+            if d not in self.watched and self.libc.inotify_add_watch(self.fd, os.fsencode(d), self.MASK) >= 0:
+                self.watched.add(d)
+        self.watched &= set(dirs)
+
+    def wait(self, timeout, settle=0.05):
+        """ block until something changes or timeout seconds pass, then give an editor's
+            burst of writes settle seconds to finish. returns whether there were events """
+        import select
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return False
+        while select.select([self.fd], [], [], settle)[0]:
+            try:
+                os.read(self.fd, 65536)
+            except BlockingIOError:
+                break
+        return True
+
+    def close(self):
+        os.close(self.fd)
+
+class OSSEMWatcher(object):
+    """ keeps a parsed OSSEM tree in memory and re-parses only the files that change.
+        poll() rescans the checkout and patches the tree, only the directories that
+        had something added, removed or modified are rebuilt and only changed files
+        in them are parsed again, so the tree always matches a fresh parse_ossem """
+    def __init__(self, ossem_dir, parser=None, workers=None):
+        self.parser = parser or OSSEMParser()
+        self.ossem_dir = ossem_dir.rstrip(os.sep)
+        self.start = self.ossem_dir.rfind(os.sep) + 1
+        self.workers = workers
+        self.ossem = {}
+        self.results = {} # path -> parsed dict for every parsed file
+        self.files, self.dirs = self.scan()
+        self.load(self.ossem_dir)
+
+    def scan(self):
+        """ (file path -> (mtime, size), set of directories) for the checkout """
+        files = {}
+        dirs = set()
+        for path, subdirs, names in os.walk(self.ossem_dir):
+            subdirs[:] = [d for d in subdirs if not d.startswith('.')]
+            dirs.add(path)
+            for f in names:
+                if not f.startswith('.'):
+                    p = os.path.join(path, f)
+                    try:
+                        st = os.stat(p)
+                    except FileNotFoundError:
+                        continue # deleted while we were looking
+                    files[p] = (st.st_mtime_ns, st.st_size)
+        return files, dirs
+
+    def load(self, top):
+        """ parse everything below top and put it in the tree """
+        top_folders = top[self.start:].split(os.sep)
+        def jobs():
+            for folders, subdir, dir_jobs in self.parser.walk_ossem(top, base=top_folders[:-1]):
+                parent = reduce(dict.get, folders[:-1], self.ossem)
+                parent[folders[-1]] = subdir
+                for key, method, p in dir_jobs:
+                    yield (subdir, key, p if method else None), method, p
+        for (subdir, key, p), result in self.parser.parse_stream(jobs(), self.workers):
+            subdir[key] = result
+            if p:
+                self.results[p] = result
+
+    def poll(self):
+        """ rescan the checkout, patch the tree for anything that changed and
+            return the sorted list of files that were added, removed or modified """
+        files, dirs = self.scan()
+        changed = {p for p in files.keys() | self.files.keys() if files.get(p) != self.files.get(p)}
+        changed_dirs = {os.path.dirname(p) for p in changed} | {os.path.dirname(d) for d in dirs ^ self.dirs}
+        old_dirs = self.dirs
+        self.files, self.dirs = files, dirs
+        for p in changed:
+            self.results.pop(p, None)
+        # parents first so a rebuilt directory is in place before its children get patched
+        for d in sorted(changed_dirs & dirs, key=lambda d: d.count(os.sep)):
+            self.refresh_dir(d, old_dirs)
+        return sorted(changed)
+
+    def refresh_dir(self, path, old_dirs):
+        """ rebuild the dictionary for a single directory reusing unchanged parse results """
+        folders = path[self.start:].split(os.sep)
+        entries = list(os.scandir(path)) # same order os.walk sees them in
+        child_dirs = [e.name for e in entries if e.is_dir() and not e.name.startswith('.')]
+        subdir, jobs = self.parser.dir_jobs(path, [e.name for e in entries if not e.is_dir()], os.path.abspath(path).split(os.sep)[1:])
+        for key, method, p in jobs:
+            if not method:
+                subdir[key] = p
+                continue
+            if p not in self.results:
+                self.results[p] = self.parser.parse_file(method, p)
+            subdir[key] = self.results[p]
+        parent = reduce(dict.get, folders[:-1], self.ossem)
+        old = parent.get(folders[-1]) or {}
+        new_dirs = []
+        for d in child_dirs:
+            child = os.path.join(path, d)
+            if child in old_dirs and isinstance(old.get(d), dict):
+                subdir[d] = old[d]
+            else:
+                subdir[d] = None # placeholder so the key keeps its walk order
+                new_dirs.append(child)
+        parent[folders[-1]] = subdir
+        for child in new_dirs:
+            self.load(child)
+
+    def watch(self, callback, interval=0.5):
+        """ loop forever calling callback(ossem, changed files) after every change.
+            uses inotify to wake up when it is available and polls every interval seconds otherwise """
+        notifier = Inotify() if Inotify.available() else None
+        try:
+            while True:
+                if notifier:
+                    notifier.watch(self.dirs)
+                    notifier.wait(interval * 10)
+                else:
+                    time.sleep(interval)
+                changed = self.poll()
+                if changed:
+                    callback(self.ossem, changed)
+        finally:
+            if notifier:
+                notifier.close()
@@ -0,0 +1,96 @@
+""" streaming xml output of a parsed tree, in the same layout dicttoxml writes """
+
+import re, functools
+
+XML_NAME = re.compile(r'^[A-Za-z_][A-Za-z0-9._-]*$')
+XML_ESCAPES = str.maketrans({'&': '&amp;', '"': '&quot;', "'": '&apos;', '<': '&lt;', '>': '&gt;'})
+
+def xml_escape(text):
+    """ escape text the same way dicttoxml does """
+    return text.translate(XML_ESCAPES)
+
+@functools.lru_cache(maxsize=4096)
+def xml_tag(key):
+    """ returns (tag name, attribute string) for a dictionary key following the
+        dicttoxml rules: valid names are used as is, numbers get an n prefix,
+        spaces become underscores and anything else becomes <key name="..."> """
+    def valid(name):
+        if name.isascii() and ':' not in name:
+            return XML_NAME.match(name) is not None
+        # leave anything unusual to an actual xml parser like dicttoxml does
+        from xml.dom.minidom import parseString
+        try:
+            parseString('<?xml version="1.0" encoding="UTF-8" ?><{0}>foo</{0}>'.format(name))
+            return True
+        except Exception:
+            return False
+    key = xml_escape(key)
+    if valid(key):
+        return key, ''
+    if key.isdigit():
+        return 'n{}'.format(key), ''
+    try:
+        return 'n{}'.format(float(key)), ''
+    except ValueError:
+        pass
+    if valid(key.replace(' ', '_')):
+        return key.replace(' ', '_'), ''
+    return 'key', ' name="{}"'.format(key)
+
+def xml_type(value):
+    """ the type attribute dicttoxml gives a value """
+    if value is None:
+        return 'null'
+    if isinstance(value, bool):
+        return 'bool'
+    if isinstance(value, str):
+        return 'str'
+    if isinstance(value, int):
+        return 'int'
+    if isinstance(value, float):
+        return 'float'
+    if isinstance(value, dict):
+        return 'dict'
+    return 'list'
+
+def iter_xml(data, root='root'):
+    """ generator yielding the xml document for data in small pieces. the output
+        is the same as dicttoxml(data) including its type="..." attributes """
+    def element(tag, attrs, value):
+        kind = xml_type(value)
+        yield '<{}{} type="{}">'.format(tag, attrs, kind)
+        if kind == 'dict':
+            for k, v in value.items():
+                yield from element(*xml_tag(k), v)
+        elif kind == 'list':
+            for v in value:
+                yield from element('item', '', v)
+        elif kind == 'bool':
+            yield str(value).lower()
+        elif kind == 'str':
+            yield xml_escape(value)
+        elif kind != 'null':
+            yield str(value)
+        yield '</{}>'.format(tag)
+
+    yield '<?xml version="1.0" encoding="UTF-8" ?><{}>'.format(root)
+    if isinstance(data, dict):
+        for k, v in data.items():
+            yield from element(*xml_tag(k), v)
+    else:
+        for v in data:
+            yield from element('item', '', v)
+    yield '</{}>'.format(root)
+
+def write_xml(data, stream, chunk_size=65536):
+    """ write data as xml to a text stream, buffering the pieces from iter_xml into chunks """
+    chunk = []
+    size = 0
+    for piece in iter_xml(data):
+        chunk.append(piece)
+        size += len(piece)
+        if size >= chunk_size:
+            stream.write(''.join(chunk))
+            chunk = []
+            size = 0
+    stream.write(''.join(chunk))
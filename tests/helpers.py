@@ -0,0 +1,29 @@
+""" helpers shared by the test suites """
+
+import unittest, os, tempfile, shutil
+from ossem_parser import OSSEMParser
+
+OSSEM_DIR = os.path.join("tests", "test_data", "OSSEM")
+
+class CountingOSSEMParser(OSSEMParser):
+    """ records which files actually get parsed """
+    def __init__(self):
+        self.parsed = []
+    def parse_file(self, method, filename):
+        self.parsed.append(filename)
+        return super().parse_file(method, filename)
+
+class TempDirTestCase(unittest.TestCase):
+    """ every test gets a scratch directory in self.tmp that is removed afterwards """
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+class OSSEMCopyTestCase(TempDirTestCase):
+    """ every test gets its own copy of the test OSSEM tree in self.ossem_dir to change """
+    def setUp(self):
+        super().setUp()
+        self.ossem_dir = os.path.join(self.tmp, "OSSEM")
+        shutil.copytree(OSSEM_DIR, self.ossem_dir)
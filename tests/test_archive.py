@@ -0,0 +1,49 @@
+""" This provides a test suite for parsing OSSEM from archives and git repositories """
+
+import unittest, os, shutil, subprocess, tarfile, zipfile
+from ossem_parser import OSSEMParser
+from ossem_archive import ArchiveSource
+from tests.helpers import OSSEM_DIR, TempDirTestCase
+
+class TestArchiveSource(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.p = OSSEMParser()
+        self.ossem_dir = OSSEM_DIR
+        self.ossem = self.p.parse_ossem(self.ossem_dir)
+
+    def test_tar_and_zip(self):
+        tar = os.path.join(self.tmp, 'ossem.tar.gz')
+        with tarfile.open(tar, 'w:gz') as fh:
+            fh.add(self.ossem_dir, arcname='OSSEM')
+        assert(self.p.parse_ossem(tar) == self.ossem)
+        assert(self.p.parse_ossem(tar, workers=2) == self.ossem)
+        z = os.path.join(self.tmp, 'OSSEM.zip')
+        with zipfile.ZipFile(z, 'w') as fh:
+            for path, dirs, files in os.walk(self.ossem_dir):
+                for f in files: # without a top level directory the archive name is used
+                    fh.write(os.path.join(path, f), os.path.relpath(os.path.join(path, f), self.ossem_dir))
+        assert(self.p.parse_ossem(z) == self.ossem)
+        assert(dict(self.p.iter_ossem(z)) == dict(self.p.iter_ossem(self.ossem_dir)))
+
+    def test_crlf_is_read_like_open(self):
+        source = ArchiveSource.__new__(ArchiveSource)
+        source.files = {'OSSEM/a.md': b'# title\r\ntext\r\n'}
+        assert(source.file('OSSEM/a.md').markdown == '# title\ntext\n')
+        assert(list(source.walk()) == [('OSSEM', [], ['a.md'])])
+
+    @unittest.skipUnless(shutil.which('git'), "git isn't installed")
+    def test_git_revision(self):
+        checkout = os.path.join(self.tmp, 'OSSEM')
+        shutil.copytree(self.ossem_dir, checkout)
+        git = ['git', '-C', checkout, '-c', 'user.name=test', '-c', 'user.email=test@example.com']
+        subprocess.run(git + ['init', '-q'], check=True)
+        subprocess.run(git + ['add', '-A'], check=True)
+        subprocess.run(git + ['commit', '-q', '-m', 'first'], check=True)
+        os.remove(os.path.join(checkout, 'common_information_model', 'alert.md'))
+        subprocess.run(git + ['commit', '-q', '-am', 'second'], check=True)
+        bare = os.path.join(self.tmp, 'OSSEM.git')
+        subprocess.run(['git', 'clone', '-q', '--bare', checkout, bare], check=True)
+        assert(self.p.parse_ossem(bare, revision='HEAD~1') == self.ossem)
+        assert('alert' not in self.p.parse_ossem(bare)['OSSEM']['common_information_model'])
+        assert(self.p.parse_ossem(checkout, revision='HEAD~1') == self.ossem)
@@ -280,3 +280,10 @@ class TestOSSEMCIM(unittest.TestCase):
             ]
         }
         assert(desired_output == self.p.parse_cim_md(self.p.read_file(self.process_md)))
+
+    def test_shared_header_keys(self):
+        alert = self.p.parse_cim_md(self.p.read_file(self.alert_md))
+        process = self.p.parse_cim_md(self.p.read_file(self.process_md))
+        alert_key = [k for k in next(iter(alert['data_fields'].values())) if k == 'sample_value'][0]
+        process_key = [k for k in next(iter(process['data_fields'].values())) if k == 'sample_value'][0]
+        assert(alert_key is process_key)
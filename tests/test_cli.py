@@ -0,0 +1,65 @@
+""" This provides a test suite for the ossem_parser.py commands """
+
+import unittest, os, sys, json, subprocess
+from ossem_parser import OSSEMParser, subset, subset_tree, dump_yaml, write_output
+from tests.helpers import OSSEM_DIR, TempDirTestCase
+
+class TestCommands(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.ossem_dir = OSSEM_DIR
+        self.ossem = OSSEMParser().parse_ossem(self.ossem_dir)
+        self.snapshot = os.path.join(self.tmp, 'ossem.snapshot')
+        self.json = os.path.join(self.tmp, 'ossem.json')
+        with open(self.snapshot, 'w') as fh:
+            write_output(self.ossem, 'snapshot', fh)
+        with open(self.json, 'w') as fh:
+            write_output(self.ossem, 'json', fh)
+
+    def run_command(self, *argv):
+        """ stdout of ossem_parser.py with -X importtime, and the modules it imported """
+        out = subprocess.run([sys.executable, '-X', 'importtime', 'ossem_parser.py'] + list(argv),
+                             stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, check=True)
+        modules = {line.split('|')[-1].strip() for line in out.stderr.splitlines() if line.startswith('import time:')}
+        return out.stdout, modules
+
+    def test_query_does_not_import_the_parser_dependencies(self):
+        for source in (['--snapshot', self.snapshot], ['--json', self.json]):
+            out, modules = self.run_command('query', *source, '--subset', 'data_dictionaries.windows.sysmon')
+            assert(json.loads(out) == subset('data_dictionaries.windows.sysmon', self.ossem))
+            assert(not modules & {'mistune', 'yaml', 'bs4', 'ossem_renderers'})
+            out, _ = self.run_command('query', *source, '--subset', 'data_dictionaries.windows', '--keys')
+            assert(json.loads(out) == list(subset('data_dictionaries.windows', self.ossem)))
+        subsets = ['common_information_model.alert', 'data_dictionaries.windows.sysmon.1.title']
+        out, _ = self.run_command('query', '--snapshot', self.snapshot, '-s', subsets[0], '-s', subsets[1])
+        assert(json.loads(out) == subset_tree(subsets, self.ossem))
+
+    def test_query_a_single_subset(self):
+        sysmon = subset('data_dictionaries.windows.sysmon', self.ossem)
+        for fmt in ('snapshot', 'json'):
+            written = os.path.join(self.tmp, 'sysmon.' + fmt)
+            with open(written, 'w') as fh:
+                write_output(sysmon, fmt, fh)
+            source = ['--' + fmt, written]
+            out, _ = self.run_command('query', *source, '--keys')
+            assert(json.loads(out) == list(sysmon))
+            out, _ = self.run_command('query', *source, '--subset', '1.title')
+            assert(json.loads(out) == sysmon['1']['title'])
+            out, _ = self.run_command('export', *source, '--output', 'json', '--subset', '1')
+            assert(json.loads(out) == sysmon['1'])
+
+    def test_export(self):
+        out, modules = self.run_command('export', '--snapshot', self.snapshot, '--output', 'yaml', '--subset', 'common_information_model')
+        assert(out == dump_yaml(subset('common_information_model', self.ossem)) + '\n')
+        assert('yaml' in modules and 'mistune' not in modules)
+
+    def test_parse_without_a_command(self):
+        out, modules = self.run_command('--ossem', self.ossem_dir, '--output', 'json', '--no-cache')
+        assert(out == json.dumps(self.ossem) + '\n')
+        assert('mistune' in modules and 'yaml' not in modules)
+
+    def test_event_index_yaml(self):
+        out, _ = self.run_command('--ossem', self.ossem_dir, '--output', 'yaml', '--event-index', '--no-cache')
+        assert('&id' not in out and '*id' not in out)
+        import yaml
+        assert(yaml.safe_load(out) == OSSEMParser().parse_ossem(self.ossem_dir, events=True))
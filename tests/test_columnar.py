@@ -0,0 +1,31 @@
+""" This provides a test suite for the columnar export of data dictionary fields """
+
+import unittest, os, io
+from ossem_parser import OSSEMParser, subset, subset_tree
+from ossem_columnar import COLUMNS, data_dictionary_rows, tree_documents, write_columnar, read_columnar
+
+class TestColumnar(unittest.TestCase):
+    def setUp(self):
+        self.p = OSSEMParser()
+        self.ossem_dir = os.path.join("tests", "test_data", "OSSEM")
+        self.ossem = self.p.parse_ossem(self.ossem_dir)
+
+    def test_rows(self):
+        rows = list(data_dictionary_rows(tree_documents(self.ossem)))
+        assert(rows == list(data_dictionary_rows(self.p.iter_ossem(self.ossem_dir))))
+        row = dict(zip(COLUMNS, [r for r in rows if r[4] == 'process_guid'][0]))
+        assert(row == {'platform': 'windows', 'provider': 'sysmon', 'event': '1', 'path': 'data_dictionaries.windows.sysmon.1',
+                       'standard_name': 'process_guid', 'field_name': 'ProcessGuid', 'type': 'string',
+                       'description': subset('data_dictionaries.windows.sysmon.1', self.ossem)['data_dictionary']['process_guid']['description'],
+                       'sample_value': '{A98268C1-9C2E-5ACD-0000-0010396CAB00}'})
+        sysmon = list(data_dictionary_rows(tree_documents(subset_tree('data_dictionaries.windows.sysmon', self.ossem))))
+        assert(sysmon == [r for r in rows if r[1] == 'sysmon'])
+
+    def test_round_trip(self):
+        rows = list(data_dictionary_rows(tree_documents(self.ossem))) + [('linux', None, 'x', 'p', 's', None, 'string', 'café \U0001F600', None)]
+        fh = io.BytesIO()
+        write_columnar(iter(rows), fh)
+        fh.seek(0)
+        columns = read_columnar(fh)
+        assert(list(columns) == COLUMNS)
+        assert(list(zip(*columns.values())) == rows)
@@ -0,0 +1,38 @@
+""" This provides a test suite for the compact representation of a parsed OSSEM tree """
+
+import unittest, os, pickle
+from ossem_parser import OSSEMParser, Record, compact_tree, expand_tree, write_output, subset, FieldIndex
+from io import StringIO
+
+class TestCompactTree(unittest.TestCase):
+    def setUp(self):
+        self.p = OSSEMParser()
+        self.ossem_dir = os.path.join("tests", "test_data", "OSSEM")
+        self.ossem = self.p.parse_ossem(self.ossem_dir)
+        self.compact = self.p.parse_ossem(self.ossem_dir, compact=True)
+
+    def test_rows_are_records(self):
+        row = subset('data_dictionaries.windows.sysmon.1', self.compact)['data_dictionary']['process_guid']
+        assert(isinstance(row, Record) and row['field_name'] == 'ProcessGuid')
+        assert(row == subset('data_dictionaries.windows.sysmon.1', self.ossem)['data_dictionary']['process_guid'])
+        other = subset('data_dictionaries.windows.sysmon.1', self.compact)['data_dictionary']['process_id']
+        assert(row._keys is other._keys)
+        self.assertRaises(KeyError, row.__getitem__, 'nope')
+        assert(FieldIndex(self.compact).find('ProcessGuid') == FieldIndex(self.ossem).find('ProcessGuid'))
+
+    def test_strings_are_shared(self):
+        first, second = ''.join(['Process', 'Guid']), ''.join(['Process', 'Guid'])
+        assert(first is not second)
+        compact = compact_tree({'a': {'field_name': first}, 'b': [{'field_name': second, 'rows': [first]}]})
+        assert(compact['a']['field_name'] is compact['b'][0]['field_name'])
+        assert(compact['b'][0]['rows'][0] is compact['a']['field_name'])
+
+    def test_lossless(self):
+        assert(expand_tree(self.compact) == self.ossem)
+        assert(expand_tree(self.ossem) is self.ossem)
+        assert(pickle.loads(pickle.dumps(self.compact)) == self.compact)
+        for output_format in ('json', 'yaml', 'xml'):
+            plain, compact = StringIO(), StringIO()
+            write_output(self.ossem, output_format, plain)
+            write_output(self.compact, output_format, compact)
+            assert(plain.getvalue() == compact.getvalue())
@@ -1,7 +1,8 @@
 """ This provides a test suite for parsing OSSEM data dictionaries """
 
 import unittest, os
-from ossem_parser import OSSEMParser
+import ossem_parser
+from ossem_parser import OSSEMParser, html_attrs, convert_unicode_quotes_dashes, add_unicode_replacements
 
 class TestOSSEMDataDictionaries(unittest.TestCase):
     def setUp(self):
@@ -265,3 +266,31 @@ class TestOSSEMDataDictionaries(unittest.TestCase):
           }
         }
         assert(self.p.parse_dd_md(self.p.read_file(self.osquery_hash_md)) == expected_output)
+
+    def test_sysmon_event_1_illustration(self):
+        output = self.p.parse_dd_md(self.p.read_file(self.sysmon_event_1_md))
+        assert(output['event_log_illustration'] == {
+          'image': {
+            'link': 'https://github.com/Cyb3rWard0g/OSSEM/blob/master/resources/images/event-1.png',
+            'alt': 'Event 2 illustration',
+            'width': 625,
+            'height': 625
+          }
+        })
+
+    def test_html_attrs(self):
+        assert(html_attrs("<IMG SRC='a&amp;b.png' alt=x width=1 height = 2 />", 'img') == {'src': 'a&b.png', 'alt': 'x', 'width': '1', 'height': '2'})
+        assert(html_attrs('<p><img src="x" alt="x > y" data-zoom width="1" height="2"></p>', 'img') == {'src': 'x', 'alt': 'x > y', 'data-zoom': '', 'width': '1', 'height': '2'})
+        assert(html_attrs('<b>no image</b>', 'img') is None)
+
+    def test_unicode_replacements(self):
+        assert(convert_unicode_quotes_dashes('it\u2019s \u201Cquoted\u201D \u2013 fine\u2026') == 'it\'s "quoted" - fine...')
+        assert(convert_unicode_quotes_dashes('caf\u00e9') == 'caf\u00e9')
+        saved = dict(ossem_parser.UNICODE_REPLACEMENTS)
+        try:
+            add_unicode_replacements({'\u00e9': 'e', '\u2018': "'"})
+            assert(convert_unicode_quotes_dashes('\u2018caf\u00e9\u2019') == "'cafe'")
+            self.assertRaises(ValueError, add_unicode_replacements, {'-': '_'})
+        finally:
+            ossem_parser.UNICODE_REPLACEMENTS.clear()
+            add_unicode_replacements(saved)
@@ -0,0 +1,30 @@
+""" This provides a test suite for the FieldIndex built from parse_ossem output """
+
+import unittest, os
+from ossem_parser import OSSEMParser, FieldIndex
+
+class TestFieldIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = FieldIndex(OSSEMParser().parse_ossem(os.path.join("tests", "test_data", "OSSEM")))
+
+    def test_find_field_name(self):
+        rows = self.index.find_field('ProcessGuid')
+        assert(rows == [{
+          'path': 'data_dictionaries.windows.sysmon.1',
+          'field_name': 'ProcessGuid',
+          'standard_name': 'process_guid',
+          'type': 'string',
+          'description': 'Process Guid of the process that got spawned/created (child)'
+        }])
+        assert(self.index.find_field('NotAField') == [])
+
+    def test_find_standard_name_and_cim(self):
+        found = self.index.find('process_guid')
+        assert([r['path'] for r in found['data_dictionaries']] == ['data_dictionaries.windows.sysmon.1'])
+        assert(found['common_information_model'] == [{
+          'path': 'common_information_model.process',
+          'schema': 'Process Schema',
+          'type': 'string',
+          'description': 'Process Guid of the main process that got spawned/created (child)'
+        }])
+        assert([r['field_name'] for r in self.index.find('hash_md5')['data_dictionaries']] == ['md5'])
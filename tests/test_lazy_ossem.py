@@ -0,0 +1,32 @@
+""" This provides a test suite for the lazily loaded OSSEM store in data/lazy.py """
+
+import os
+from ossem_parser import OSSEMParser
+from data.lazy import LazyDict, write_store, load
+from tests.helpers import OSSEM_DIR, TempDirTestCase
+
+class TestLazyOSSEM(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.ossem = OSSEMParser().parse_ossem(OSSEM_DIR)
+
+    def test_store_round_trip(self):
+        store = os.path.join(self.tmp, "ossem.store")
+        write_store(self.ossem, store, max_blob=1024)
+        lazy = load(store)
+        assert(isinstance(lazy['OSSEM']['data_dictionaries'], LazyDict))
+        assert(lazy['OSSEM']['data_dictionaries']['windows']['sysmon']['1'] == self.ossem['OSSEM']['data_dictionaries']['windows']['sysmon']['1'])
+        assert(lazy['OSSEM']['common_information_model'] is lazy['OSSEM']['common_information_model'])
+        assert(list(lazy['OSSEM'].keys()) == list(self.ossem['OSSEM'].keys()))
+        assert(lazy.to_dict() == self.ossem)
+
+    def test_shipped_store(self):
+        from data.lazy import ossem
+        sysmon_events = ossem['OSSEM']['data_dictionaries']['windows']['sysmon']
+        sysmon_events = {key: sysmon_events[key] for key in sysmon_events.keys() if key.isnumeric()}
+        assert(sysmon_events['1']['data_dictionary']['process_guid']['field_name'] == 'ProcessGuid')
+
+    def test_shipped_store_is_up_to_date(self):
+        # data/ossem.store is rebuilt by hand with python3 -m data.lazy, this catches a stale one
+        from data.ossem import ossem
+        assert(load().to_dict() == ossem)
@@ -0,0 +1,174 @@
+""" This provides a test suite for walking an OSSEM checkout with parse_ossem """
+
+import unittest, unittest.mock, os, json
+from ossem_parser import OSSEMParser, ParseStats, subset, subset_tree, event_index
+from ossem_cache import ParseCache
+from tests.helpers import CountingOSSEMParser, OSSEMCopyTestCase
+
+class TestParseOSSEM(unittest.TestCase):
+    def setUp(self):
+        self.p = OSSEMParser()
+        self.ossem_dir = os.path.join("tests", "test_data", "OSSEM")
+
+    def test_parse_ossem_layout(self):
+        ossem = self.p.parse_ossem(self.ossem_dir)
+        assert(subset('data_dictionaries.windows.osquery.hash', ossem) == self.p.parse_dd_md(self.p.read_file(os.path.join("tests", "test_data", "osquery-hash.md"))))
+        assert(subset('common_information_model.alert', ossem) == self.p.parse_cim_md(self.p.read_file(os.path.join("tests", "test_data", "alert.md"))))
+        assert('1' in subset('data_dictionaries.windows.sysmon', ossem))
+        assert(ossem['OSSEM']['resources']['images']['1.png'] == {'link': 'https://github.com/Cyb3rWard0g/OSSEM/blob/master/resources/images/event-1.png'})
+        assert(ossem['OSSEM']['README'] is None)
+
+    def test_parse_a_section(self):
+        ossem = self.p.parse_ossem(self.ossem_dir)
+        section = self.p.parse_ossem(os.path.join(self.ossem_dir, "data_dictionaries"))
+        assert(section['data_dictionaries'] == ossem['OSSEM']['data_dictionaries'])
+        sysmon = self.p.parse_ossem(os.path.join(self.ossem_dir, "data_dictionaries", "windows", "sysmon"))
+        assert(sysmon['sysmon']['1'] == subset('data_dictionaries.windows.sysmon.1', ossem))
+
+    def test_parse_stats(self):
+        stats = ParseStats()
+        ossem = self.p.parse_ossem(self.ossem_dir, stats=stats)
+        assert(json.dumps(ossem) == json.dumps(self.p.parse_ossem(self.ossem_dir)))
+        assert(stats.counters['files'] == 8 and len(stats.records) == 8)
+        record = [r for r in stats.records if r['file'].endswith('alert.md')][0]
+        assert(record['renderer'] == 'CIMDictRenderer')
+        assert(record['tables'] == 1 and record['rows'] == 7)
+        assert(record['bytes'] == os.path.getsize(os.path.join(self.ossem_dir, 'common_information_model', 'alert.md')))
+        assert(sum(stats.histograms['CIMDictRenderer']) == 4)
+        assert(stats.slowest(1)[0]['seconds'] == max(r['seconds'] for r in stats.records))
+        assert('slowest files:' in stats.summary())
+
+    def test_event_index(self):
+        ossem = self.p.parse_ossem(self.ossem_dir, events=True)
+        sysmon = ossem['event_index']['windows']['sysmon']
+        assert(sysmon['event_ids'] == [1])
+        assert(sysmon['events']['1'] is subset('data_dictionaries.windows.sysmon.1', ossem))
+        assert(list(ossem['event_index']['windows']) == ['sysmon']) # osquery.hash isn't an event id
+        from data.ossem import ossem as full_ossem
+        security = event_index(full_ossem)['windows']['security']
+        assert(security['events']['4688'] is full_ossem['OSSEM']['data_dictionaries']['windows']['security']['events']['4688'])
+        assert(security['event_ids'] == sorted(security['event_ids']) and 4688 in security['event_ids'])
+
+    def test_parse_many(self):
+        from ossem_parser import CIMDictRenderer
+        cim_dir = os.path.join(self.ossem_dir, 'common_information_model')
+        docs = [self.p.read_file(os.path.join(cim_dir, f)) for f in ('alert.md', 'process.md', 'alert.md')]
+        batch = list(self.p.parse_many(CIMDictRenderer, docs))
+        assert(batch == [self.p.parse_cim_md(d) for d in docs])
+        assert(batch[0] is not batch[2]) # every document gets a fresh dict
+
+    def test_renderers_follow_the_module_settings(self):
+        import io, contextlib, ossem_parser
+        alert = self.p.read_file(os.path.join("tests", "test_data", "alert.md"))
+        out = io.StringIO()
+        with unittest.mock.patch.object(ossem_parser, 'VERBOSE', True), contextlib.redirect_stdout(out):
+            self.p.parse_cim_md(alert)
+        assert('table_cell:' in out.getvalue())
+        with unittest.mock.patch.object(ossem_parser, 'lower_under_joined', str.upper):
+            assert('DATA FIELDS' in self.p.parse_cim_md(alert))
+
+    def test_parallel_matches_serial(self):
+        serial = self.p.parse_ossem(self.ossem_dir)
+        parallel = self.p.parse_ossem(self.ossem_dir, workers=2)
+        assert(json.dumps(parallel) == json.dumps(serial))
+
+class TestParseCache(OSSEMCopyTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cache_dir = os.path.join(self.tmp, "cache")
+        self.p = CountingOSSEMParser()
+
+    def test_unchanged_files_are_not_parsed(self):
+        first = self.p.parse_ossem(self.ossem_dir, cache_dir=self.cache_dir)
+        parsed = len(self.p.parsed)
+        self.p.parsed = []
+        second = self.p.parse_ossem(self.ossem_dir, cache_dir=self.cache_dir)
+        assert(parsed > 0 and self.p.parsed == [])
+        assert(json.dumps(first) == json.dumps(second))
+        assert(json.dumps(second) == json.dumps(OSSEMParser().parse_ossem(self.ossem_dir)))
+
+    def test_misses_are_hashed_once(self):
+        with unittest.mock.patch.object(ParseCache, '_sha256', autospec=True, side_effect=ParseCache._sha256) as sha256, \
+             unittest.mock.patch.object(ParseCache, '_stat', autospec=True, side_effect=ParseCache._stat) as stat:
+            self.p.parse_ossem(self.ossem_dir, cache_dir=self.cache_dir)
+        assert(sha256.call_count == stat.call_count == len(self.p.parsed))
+
+    def test_changed_renamed_and_deleted_files(self):
+        self.p.parse_ossem(self.ossem_dir, cache_dir=self.cache_dir)
+        cim = os.path.join(self.ossem_dir, "common_information_model")
+        with open(os.path.join(cim, "alert.md"), "a") as fh:
+            fh.write("|\talert_extra\t|\tstring\t|\tAn extra field\t|\tfoo\t|\n")
+        os.rename(os.path.join(cim, "event.md"), os.path.join(cim, "events.md"))
+        os.remove(os.path.join(cim, "destination.md"))
+        self.p.parsed = []
+        ossem = self.p.parse_ossem(self.ossem_dir, cache_dir=self.cache_dir)
+        assert(self.p.parsed == [os.path.join(cim, "alert.md")])
+        assert(json.dumps(ossem) == json.dumps(OSSEMParser().parse_ossem(self.ossem_dir)))
+        assert('alert_extra' in ossem['OSSEM']['common_information_model']['alert']['data_fields'])
+        cache = ParseCache(self.cache_dir, self.ossem_dir)
+        assert(os.path.join("common_information_model", "destination.md") not in cache.entries)
+        assert(os.path.join("common_information_model", "events.md") in cache.entries)
+
+    def test_other_parser_code_invalidates_the_cache(self):
+        self.p.parse_ossem(self.ossem_dir, cache_dir=self.cache_dir)
+        cache = ParseCache(self.cache_dir, self.ossem_dir)
+        assert(len(cache.entries) > 0)
+        with open(cache.filename) as fh:
+            saved = json.load(fh)
+        saved['parser_fingerprint'] = 'written by an older parser'
+        with open(cache.filename, 'w') as fh:
+            json.dump(saved, fh)
+        assert(ParseCache(self.cache_dir, self.ossem_dir).entries == {})
+        self.p.parsed = []
+        self.p.parse_ossem(self.ossem_dir, cache_dir=self.cache_dir)
+        assert(len(self.p.parsed) == len(cache.entries))
+
+    def test_subsets_keep_the_rest_of_the_cache(self):
+        self.p.parse_ossem(self.ossem_dir, cache_dir=self.cache_dir)
+        self.p.parse_ossem(self.ossem_dir, cache_dir=self.cache_dir, subsets=['common_information_model.alert'])
+        self.p.parsed = []
+        self.p.parse_ossem(self.ossem_dir, cache_dir=self.cache_dir)
+        assert(self.p.parsed == [])
+
+class TestSubsetPushdown(unittest.TestCase):
+    def setUp(self):
+        self.p = CountingOSSEMParser()
+        self.ossem_dir = os.path.join("tests", "test_data", "OSSEM")
+        self.ossem = OSSEMParser().parse_ossem(self.ossem_dir)
+
+    def test_only_the_subset_is_parsed(self):
+        for s in ['data_dictionaries.windows.sysmon', 'data_dictionaries.windows.sysmon.1', 'common_information_model.alert.data_fields', 'resources']:
+            self.p.parsed = []
+            ossem = self.p.parse_ossem(self.ossem_dir, subsets=[s])
+            assert(json.dumps(subset(s, ossem)) == json.dumps(subset(s, self.ossem)))
+        self.p.parsed = []
+        ossem = self.p.parse_ossem(self.ossem_dir, subsets=['data_dictionaries.windows.sysmon'])
+        assert(self.p.parsed == [os.path.join(self.ossem_dir, 'data_dictionaries', 'windows', 'sysmon', 'event-1.md')])
+        assert(list(ossem['OSSEM']['data_dictionaries']['windows']) == ['sysmon'])
+
+    def test_several_subsets(self):
+        subsets = ['common_information_model.alert', 'data_dictionaries.windows.osquery', 'common_information_model.process']
+        ossem = self.p.parse_ossem(self.ossem_dir, subsets=subsets)
+        assert(len(self.p.parsed) == 3)
+        assert(subset_tree(subsets, ossem) == subset_tree(subsets, self.ossem))
+        assert(subset_tree(subsets + ['common_information_model'], self.ossem)['OSSEM']['common_information_model'] == subset('common_information_model', self.ossem))
+        paths = sorted(p for p, d in self.p.iter_ossem(self.ossem_dir, subsets=subsets))
+        assert(paths == ['common_information_model.alert', 'common_information_model.process', 'data_dictionaries.windows.osquery.hash'])
+
+class TestIterOSSEM(unittest.TestCase):
+    def setUp(self):
+        self.p = OSSEMParser()
+        self.ossem_dir = os.path.join("tests", "test_data", "OSSEM")
+
+    def test_records_match_parse_ossem(self):
+        ossem = self.p.parse_ossem(self.ossem_dir)
+        records = list(self.p.iter_ossem(self.ossem_dir))
+        paths = [path for path, data in records]
+        assert('data_dictionaries.windows.sysmon.1' in paths)
+        assert('common_information_model.process' in paths)
+        for path, data in records:
+            if path.startswith('resources.images.'):
+                assert(ossem['OSSEM']['resources']['images'][path[len('resources.images.'):]] == data)
+            else:
+                assert(subset(path, ossem) == data)
+        assert(list(self.p.iter_ossem(self.ossem_dir, workers=2)) == records)
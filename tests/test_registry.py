@@ -0,0 +1,37 @@
+""" This provides a test suite for the renderer registry that routes OSSEM files to parsers """
+
+import os, shutil
+from ossem_parser import OSSEMParser, RendererRegistry, RENDERERS, subset
+from tests.helpers import OSSEMCopyTestCase
+
+class TestRendererRegistry(OSSEMCopyTestCase):
+    def setUp(self):
+        super().setUp()
+        self.rules = list(RENDERERS.rules)
+
+    def tearDown(self):
+        RENDERERS.rules[:] = self.rules
+        RENDERERS.dirs.clear()
+        super().tearDown()
+
+    def test_dispatch(self):
+        registry = RendererRegistry()
+        registry.entry_points_loaded = True
+        registry.register('data_dictionaries', 'parse_dd_md')
+        registry.register('data_dictionaries/*/osquery', 'parse_cim_md')
+        assert(registry.dispatch(['data_dictionaries', 'windows', 'sysmon']) == {'.md': ('parse_dd_md', None)})
+        assert(registry.dispatch(['data_dictionaries', 'windows', 'osquery']) == {'.md': ('parse_cim_md', None)})
+        assert(registry.dispatch(['common_information_model']) == {})
+
+    def test_plugin_section(self):
+        section = os.path.join(self.ossem_dir, 'schemas')
+        os.makedirs(section)
+        shutil.copy(os.path.join("tests", "test_data", "alert.md"), os.path.join(section, "alert.md"))
+        with open(os.path.join(section, 'notes.txt'), 'w') as fh:
+            fh.write('not markdown')
+        RENDERERS.register('schemas', 'ossem_parser:CIMDictRenderer')
+        RENDERERS.register('schemas', extension='.txt', value=lambda f: {'file': f})
+        for workers in (None, 2):
+            ossem = OSSEMParser().parse_ossem(self.ossem_dir, workers=workers)
+            assert(subset('schemas.alert', ossem) == subset('common_information_model.alert', ossem))
+            assert(subset('schemas', ossem)['notes.txt'] == {'file': 'notes.txt'})
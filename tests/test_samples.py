@@ -0,0 +1,64 @@
+""" This provides a test suite for converting sample values to their declared types """
+
+import unittest, os, json, copy
+from ossem_parser import OSSEMParser, ParseStats, coerce_samples, typed_tree, subset
+
+FIELDS_MD = """# Typed Samples
+
+## Data Dictionary
+
+|	Standard name	|	Field Name	|	Type	|	Description	|	Sample Value	|
+| 	----------------	|	----------------	|	----------------	|	----------------	|	----------------	|
+|	process_id	|	ProcessId	|	integer	|	Process id	|	0x10	|
+|	logon_id	|	LogonId	|	integer	|	Logon id	|	not a number	|
+|	bytes_sent	|	BytesSent	|	long	|	Bytes	|	130921702131467731	|
+|	is_ipv6	|	IsIpv6	|	boolean	|	IPv6	|	FALSE	|
+|	dst_ip	|	DestinationIp	|	ip	|	Destination	|	2001:0db8:0:0:0:0:0:1	|
+|	utc_time	|	UtcTime	|	date	|	Time	|	4/11/18 6:01	|
+|	process_guid	|	ProcessGuid	|	guid	|	Guid	|	{A98268C1-9C2E-5ACD-0000-00100266AB00}	|
+|	flags	|	Flags	|	hex	|	Flags	|	0x4a5af0	|
+|	user	|	User	|	string	|	User	|	bob	|
+|	port	|	Port	|	integer	|	Port	|		|
+"""
+
+class TestSampleValues(unittest.TestCase):
+    def setUp(self):
+        self.p = OSSEMParser()
+        self.doc = self.p.parse_dd_md(FIELDS_MD)
+
+    def test_renderer_only_converts_integers(self):
+        fields = self.doc['data_dictionary']
+        assert(fields['process_id']['sample_value'] == 16)
+        assert(fields['logon_id']['sample_value'] is None and fields['port']['sample_value'] is None)
+        assert(fields['bytes_sent']['sample_value'] == '130921702131467731')
+        assert(self.p.last_renderer.sample_errors == [{'field': 'logon_id', 'type': 'integer', 'value': 'not a number',
+                                                       'error': "invalid literal for int() with base 0: 'not a number'"}])
+
+    def test_typed_tree(self):
+        before = copy.deepcopy(self.doc)
+        errors = []
+        typed = typed_tree(self.doc, errors)
+        assert(self.doc == before) # the parsed tree (and the parse cache holding it) is left alone
+        samples = {k: v['sample_value'] for k, v in typed['data_dictionary'].items()}
+        assert(samples == {'process_id': 16, 'logon_id': None, 'bytes_sent': 130921702131467731, 'is_ipv6': False,
+                           'dst_ip': '2001:db8::1', 'utc_time': '2018-04-11T06:01:00', 'process_guid': 'a98268c1-9c2e-5acd-0000-00100266ab00',
+                           'flags': 0x4a5af0, 'user': 'bob', 'port': None})
+        assert(errors == [])
+        assert(typed_tree(typed) == typed)
+
+    def test_errors(self):
+        fields = {'a': {'type': 'Boolean', 'sample_value': 'C:\\Windows\\cmd.exe'}, 'b': {'type': 'date', 'sample_value': '-'},
+                  'c': {'type': 'ip', 'sample_value': {'link': 'http://10.0.0.1', 'text': '10.0.0.1'}}, 'd': {'type': 'date', 'sample_value': '2019-02-25T22:33:21Z'}}
+        errors = coerce_samples(fields)
+        assert([(e['field'], e['type']) for e in errors] == [('a', 'Boolean'), ('b', 'date'), ('c', 'ip')])
+        assert([f['sample_value'] for f in fields.values()] == [None, None, None, '2019-02-25T22:33:21+00:00'])
+
+    def test_parse_ossem_typed(self):
+        ossem_dir = os.path.join("tests", "test_data", "OSSEM")
+        stats = ParseStats()
+        typed = self.p.parse_ossem(ossem_dir, typed=True, stats=stats)
+        assert(typed == typed_tree(self.p.parse_ossem(ossem_dir)))
+        assert(subset('common_information_model.alert', typed)['data_fields']['alert_id']['sample_value'] == 1234)
+        assert(dict(self.p.iter_ossem(ossem_dir, typed=True))['data_dictionaries.windows.sysmon.1'] == subset('data_dictionaries.windows.sysmon.1', typed))
+        assert(stats.sample_errors == [])
+        json.dumps(typed)
@@ -0,0 +1,81 @@
+""" This provides a test suite for the OSSEM HTTP query service """
+
+import unittest, os, json, asyncio, argparse
+from ossem_parser import OSSEMParser, subset, write_output
+from ossem_server import OSSEMService, start_server, load_ossem
+from tests.helpers import OSSEM_DIR, TempDirTestCase
+
+class TestOSSEMService(unittest.TestCase):
+    def setUp(self):
+        self.ossem = OSSEMParser().parse_ossem(os.path.join("tests", "test_data", "OSSEM"))
+        self.service = OSSEMService(self.ossem)
+
+    def test_subset_lookups(self):
+        status, headers, body = self.service.respond('GET', '/ossem/data_dictionaries.windows.sysmon.1', {})
+        assert(status == 200)
+        assert(json.loads(body) == subset('data_dictionaries.windows.sysmon.1', self.ossem))
+        assert(json.loads(self.service.respond('GET', '/ossem', {})[2]) == self.ossem['OSSEM'])
+        assert(self.service.respond('GET', '/ossem/data_dictionaries.nope', {})[0] == 404)
+        assert(self.service.respond('POST', '/ossem', {})[0] == 405)
+
+    def test_etags_and_cached_bodies(self):
+        status, headers, body = self.service.respond('GET', '/ossem/common_information_model.alert', {})
+        etag = dict(headers)['ETag']
+        assert(self.service.respond('GET', '/ossem/common_information_model.alert', {})[2] is body)
+        status, headers, body = self.service.respond('GET', '/ossem/common_information_model.alert', {'if-none-match': etag})
+        assert(status == 304 and body == b'')
+
+    def test_fields_and_events(self):
+        fields = json.loads(self.service.respond('GET', '/fields/ProcessGuid', {})[2])
+        assert(fields['data_dictionaries'][0]['path'] == 'data_dictionaries.windows.sysmon.1')
+        events = json.loads(self.service.respond('GET', '/events/1?provider=sysmon', {})[2])
+        assert(events == {'windows.sysmon': subset('data_dictionaries.windows.sysmon.1', self.ossem)})
+        assert(self.service.respond('GET', '/events/1?provider=security', {})[0] == 404)
+
+    def test_bodies_are_bounded(self):
+        for name in ('nope{}'.format(i) for i in range(50)):
+            assert(self.service.respond('GET', '/fields/{}'.format(name), {})[0] == 404)
+        assert(len(self.service.bodies) == 0)
+        service = OSSEMService(self.ossem, max_bodies=2)
+        for name in ('ProcessGuid', 'process_id', 'alert_id', 'ProcessGuid'):
+            assert(service.respond('GET', '/fields/{}'.format(name), {})[0] == 200)
+        assert(list(service.bodies) == [('fields', 'alert_id'), ('fields', 'ProcessGuid')])
+
+    def test_precomputed_subtrees(self):
+        for path in ('', 'data_dictionaries', 'data_dictionaries.windows.sysmon.1', 'common_information_model.alert.data_fields'):
+            body, etag = self.service.subtrees[('ossem', path)]
+            assert(body == json.dumps(self.service.lookup(path)).encode('utf-8'))
+        assert(('ossem', 'resources.images.1.png') not in self.service.subtrees)
+        assert(self.service.respond('GET', '/ossem/resources.images.1.png', {})[0] == 404)
+        self.service.respond('GET', '/ossem/data_dictionaries.windows', {})
+        assert(len(self.service.bodies) == 0)
+
+    def test_http_round_trip(self):
+        async def run():
+            server = await start_server(self.service, '127.0.0.1', 0)
+            port = server.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            responses = []
+            for _ in range(2): # two requests on the same keep-alive connection
+                writer.write(b'GET /ossem/common_information_model.alert HTTP/1.1\r\nHost: localhost\r\n\r\n')
+                head = await reader.readuntil(b'\r\n\r\n')
+                length = int([l for l in head.split(b'\r\n') if l.lower().startswith(b'content-length')][0].split(b':')[1])
+                responses.append((head, await reader.readexactly(length)))
+            writer.close()
+            server.close()
+            await server.wait_closed()
+            return responses
+        responses = asyncio.run(run())
+        assert(responses[0][0].startswith(b'HTTP/1.1 200 OK'))
+        assert(json.loads(responses[1][1]) == subset('common_information_model.alert', self.ossem))
+
+class TestServeSubset(TempDirTestCase):
+    def test_single_subset_snapshot(self):
+        sysmon = subset('data_dictionaries.windows.sysmon', OSSEMParser().parse_ossem(OSSEM_DIR))
+        filename = os.path.join(self.tmp, 'sysmon.snapshot')
+        with open(filename, 'w') as fh:
+            write_output(sysmon, 'snapshot', fh)
+        service = OSSEMService(load_ossem(argparse.Namespace(ossem=None, snapshot=filename, json=None)))
+        assert(json.loads(service.respond('GET', '/ossem', {})[2]) == sysmon)
+        assert(json.loads(service.respond('GET', '/ossem/1.title', {})[2]) == sysmon['1']['title'])
+        assert(service.respond('GET', '/ossem/data_dictionaries', {})[0] == 404)
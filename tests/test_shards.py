@@ -0,0 +1,43 @@
+""" This provides a test suite for writing every OSSEM document to its own file """
+
+import unittest, os, json
+from ossem_parser import OSSEMParser, subset
+from ossem_shards import write_shards
+from tests.helpers import OSSEM_DIR, TempDirTestCase
+
+class TestShards(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.p = OSSEMParser()
+        self.ossem_dir = OSSEM_DIR
+        self.out = self.tmp
+
+    def documents(self):
+        return self.p.iter_ossem(self.ossem_dir, keys=True)
+
+    def test_layout_and_manifest(self):
+        assert(write_shards(self.documents(), self.out, 'json') == (9, 0, 0))
+        with open(os.path.join(self.out, 'data_dictionaries', 'windows', 'sysmon', '1.json')) as fh:
+            assert(json.load(fh) == subset('data_dictionaries.windows.sysmon.1', self.p.parse_ossem(self.ossem_dir)))
+        assert(os.path.isfile(os.path.join(self.out, 'resources', 'images', '1.png.json')))
+        with open(os.path.join(self.out, 'manifest.json')) as fh:
+            manifest = json.load(fh)
+        entry = manifest['files'][os.path.join('common_information_model', 'alert.json')]
+        assert(entry['path'] == 'common_information_model.alert')
+        assert(entry['size'] == os.path.getsize(os.path.join(self.out, 'common_information_model', 'alert.json')))
+
+    def test_only_changed_shards_are_written(self):
+        write_shards(self.documents(), self.out, 'yaml')
+        alert = os.path.join(self.out, 'common_information_model', 'alert.yaml')
+        os.utime(alert, ns=(0, 0))
+        assert(write_shards(self.documents(), self.out, 'yaml', workers=2) == (0, 9, 0))
+        assert(os.stat(alert).st_mtime_ns == 0)
+        sysmon_only = lambda: ((k, d) for k, d in self.documents() if k[:3] == ['data_dictionaries', 'windows', 'sysmon'])
+        assert(write_shards(sysmon_only(), self.out, 'yaml', subsets=['data_dictionaries.windows.sysmon']) == (0, 1, 0))
+        assert(os.stat(alert).st_mtime_ns == 0) # shards outside the subset are left alone
+        with open(os.path.join(self.out, 'manifest.json')) as fh:
+            assert(len(json.load(fh)['files']) == 9)
+        self.assertRaises(ValueError, write_shards, sysmon_only(), self.out, 'json', subsets=['data_dictionaries.windows.sysmon'])
+        assert(write_shards(sysmon_only(), self.out, 'yaml') == (0, 1, 8))
+        assert(sorted(os.listdir(self.out)) == ['data_dictionaries', 'manifest.json'])
+        assert(write_shards(self.documents(), self.out, 'json') == (9, 0, 1)) # a new format replaces everything
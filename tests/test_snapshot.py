@@ -0,0 +1,31 @@
+""" This provides a test suite for the memory mapped OSSEM snapshots """
+
+import os
+from ossem_parser import OSSEMParser, subset
+from ossem_snapshot import Snapshot, write_snapshot
+from tests.helpers import OSSEM_DIR, TempDirTestCase
+
+class TestSnapshot(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.ossem = OSSEMParser().parse_ossem(OSSEM_DIR)
+        self.filename = os.path.join(self.tmp, "ossem.snapshot")
+        with open(self.filename, "wb") as fh:
+            write_snapshot(self.ossem, fh)
+        self.snapshot = Snapshot(self.filename)
+
+    def tearDown(self):
+        self.snapshot.close()
+        super().tearDown()
+
+    def test_round_trip(self):
+        assert(self.snapshot.get() == self.ossem)
+        assert(list(self.snapshot.get().keys()) == list(self.ossem.keys()))
+
+    def test_subset_lookups(self):
+        for path in ['data_dictionaries.windows.sysmon', 'data_dictionaries.windows.sysmon.1', 'common_information_model.process.data_fields', 'detection_data_model']:
+            assert(self.snapshot.subset(path) == subset(path, self.ossem))
+        assert(self.snapshot.keys('OSSEM.data_dictionaries.windows') == list(self.ossem['OSSEM']['data_dictionaries']['windows'].keys()))
+        assert(self.snapshot.get(['OSSEM', 'resources', 'images', '1.png']) == self.ossem['OSSEM']['resources']['images']['1.png'])
+        with self.assertRaises(KeyError):
+            self.snapshot.subset('data_dictionaries.windows.nope')
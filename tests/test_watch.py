@@ -0,0 +1,66 @@
+""" This provides a test suite for the OSSEMWatcher used by --watch """
+
+import unittest, os, sys, json, shutil, subprocess, time
+from ossem_parser import OSSEMParser
+from ossem_watch import OSSEMWatcher
+from tests.helpers import CountingOSSEMParser, OSSEMCopyTestCase
+
+class TestOSSEMWatcher(OSSEMCopyTestCase):
+    def setUp(self):
+        super().setUp()
+        self.p = CountingOSSEMParser()
+        self.watcher = OSSEMWatcher(self.ossem_dir, parser=self.p)
+
+    def assert_matches_fresh_parse(self):
+        assert(json.dumps(self.watcher.ossem) == json.dumps(OSSEMParser().parse_ossem(self.ossem_dir)))
+
+    def test_initial_tree(self):
+        self.assert_matches_fresh_parse()
+        assert(self.watcher.poll() == [])
+
+    def test_only_changed_files_are_parsed(self):
+        self.p.parsed = []
+        alert = os.path.join(self.ossem_dir, "common_information_model", "alert.md")
+        with open(alert, "a") as fh:
+            fh.write("|\talert_extra\t|\tstring\t|\tAn extra field\t|\tfoo\t|\n")
+        assert(self.watcher.poll() == [alert])
+        assert(self.p.parsed == [alert])
+        assert('alert_extra' in self.watcher.ossem['OSSEM']['common_information_model']['alert']['data_fields'])
+        self.assert_matches_fresh_parse()
+
+    def test_added_removed_and_new_directories(self):
+        sysmon = os.path.join(self.ossem_dir, "data_dictionaries", "windows", "sysmon")
+        shutil.copy(os.path.join(sysmon, "event-1.md"), os.path.join(sysmon, "event-2.md"))
+        os.remove(os.path.join(self.ossem_dir, "common_information_model", "event.md"))
+        linux = os.path.join(self.ossem_dir, "data_dictionaries", "linux", "osquery")
+        os.makedirs(linux)
+        shutil.copy(os.path.join(self.ossem_dir, "data_dictionaries", "windows", "osquery", "hash.md"), linux)
+        shutil.rmtree(os.path.join(self.ossem_dir, "detection_data_model"))
+        self.watcher.poll()
+        ossem = self.watcher.ossem['OSSEM']
+        assert('2' in ossem['data_dictionaries']['windows']['sysmon'])
+        assert('event' not in ossem['common_information_model'])
+        assert(ossem['data_dictionaries']['linux']['osquery']['hash']['title'] == 'Hash Table')
+        assert('detection_data_model' not in ossem)
+        self.assert_matches_fresh_parse()
+
+    def test_cli_writes_the_event_index(self):
+        out = os.path.join(self.tmp, 'ossem.json')
+        watch = subprocess.Popen([sys.executable, 'ossem_parser.py', '--ossem', self.ossem_dir, '--watch', '--event-index', '--out', out],
+                                 stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            deadline = time.time() + 30
+            while not os.path.exists(out) and time.time() < deadline:
+                time.sleep(0.05)
+            with open(out) as fh:
+                ossem = json.load(fh)
+        finally:
+            watch.terminate()
+            watch.wait()
+        assert(ossem == json.loads(json.dumps(OSSEMParser().parse_ossem(self.ossem_dir, events=True))))
+
+    def test_cli_rejects_what_it_cant_watch(self):
+        for option in (['--stats'], ['--find-field', 'ProcessGuid'], ['--output-dir', self.tmp]):
+            out = subprocess.check_output([sys.executable, 'ossem_parser.py', '--ossem', self.ossem_dir, '--watch', '--out',
+                                           os.path.join(self.tmp, 'ossem.json')] + option, universal_newlines=True)
+            assert(out.startswith("--watch only rewrites --out files") and option[0] in out)
@@ -0,0 +1,34 @@
+""" This provides a test suite for the built in xml writer """
+
+import unittest, os, io
+import xml.etree.ElementTree as ET
+from ossem_parser import OSSEMParser
+from ossem_xml import iter_xml, write_xml
+
+try:
+    from dicttoxml import dicttoxml
+except ImportError:
+    dicttoxml = None
+
+class TestXMLOutput(unittest.TestCase):
+    def setUp(self):
+        self.ossem = OSSEMParser().parse_ossem(os.path.join("tests", "test_data", "OSSEM"))
+
+    def test_valid_xml_with_types(self):
+        out = io.StringIO()
+        write_xml(self.ossem, out, chunk_size=128)
+        root = ET.fromstring(out.getvalue())
+        assert(root.find('OSSEM').get('type') == 'dict')
+        assert(root.find('OSSEM/README').get('type') == 'null')
+        event = root.find('OSSEM/data_dictionaries/windows/sysmon/n1')
+        assert(event.find('title').text == 'Event ID 1: Process creation')
+        assert(event.find('data_dictionary/process_id/sample_value').get('type') == 'int')
+        assert(root.find('OSSEM/detection_data_model/object_relationships/rows').get('type') == 'list')
+        assert(root.find("OSSEM/detection_data_model/object_relationships/rows/item/key[@name='Data Objects (Origin)']").text == 'process')
+        assert(out.getvalue() == ''.join(iter_xml(self.ossem)))
+
+    @unittest.skipUnless(dicttoxml, "dicttoxml is not installed")
+    def test_matches_dicttoxml(self):
+        assert(''.join(iter_xml(self.ossem)) == dicttoxml(self.ossem).decode('utf-8'))
+        odd_keys = {'1': 1, '1.5': 2, 'a b': 'c', 'a&b': '<&"\'>', 'a:b': [None, {'x': True}], 'README': None}
+        assert(''.join(iter_xml(odd_keys)) == dicttoxml(odd_keys).decode('utf-8'))
@@ -0,0 +1,32 @@
+""" This provides a test suite for the yaml output engines """
+
+import unittest, os
+import yaml
+from ossem_parser import OSSEMParser, dump_yaml, yaml_dumper
+
+class TestYAMLOutput(unittest.TestCase):
+    def setUp(self):
+        self.ossem = OSSEMParser().parse_ossem(os.path.join("tests", "test_data", "OSSEM"))
+
+    def test_python_engine(self):
+        out = dump_yaml(self.ossem, engine='python')
+        assert(yaml.safe_load(out) == self.ossem)
+        assert(out == yaml.dump(self.ossem, default_flow_style=False, width=2 ** 30))
+
+    @unittest.skipUnless(getattr(yaml, 'CSafeDumper', None), "pyyaml built without libyaml")
+    def test_libyaml_matches_python(self):
+        assert(yaml_dumper('auto') is yaml.CSafeDumper)
+        assert(dump_yaml(self.ossem, engine='libyaml') == dump_yaml(self.ossem, engine='python'))
+
+    def test_event_index_without_aliases(self):
+        ossem = OSSEMParser().parse_ossem(os.path.join("tests", "test_data", "OSSEM"), events=True)
+        for engine in ('python', 'auto'):
+            out = dump_yaml(ossem, engine=engine)
+            assert('&id' not in out and '*id' not in out)
+            assert(yaml.safe_load(out) == ossem)
+        events = dump_yaml(ossem['event_index']['windows']['sysmon']['events'])
+        assert(events == dump_yaml({'1': ossem['OSSEM']['data_dictionaries']['windows']['sysmon']['1']}))
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            dump_yaml(self.ossem, engine='nope')